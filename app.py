@@ -7,7 +7,11 @@ from models import (
     Category,
     Review,
     UserEvent,
-    Admission
+    Admission,
+    event_category_table,
+    event_list_options,
+    category_list_options,
+    upcoming_events
 )
 from forms import (
     EventForm,
@@ -27,11 +31,51 @@ from forms import (
     DeleteEventForm
 )
 from yaml import load, FullLoader
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import contains_eager, joinedload
 from flask_bcrypt import Bcrypt
+from flask_migrate import Migrate
 from datetime import datetime as dt, timedelta
 import calendar
-from utils import get_category_choices
+import click
+from utils import get_category_choices, bump_category_version, make_etag
+from calendar_builder import (
+    build_event_calendar,
+    build_user_calendar,
+    event_row_variant,
+    visibility_tier,
+    visible_events
+)
+from fragment_cache import FragmentCache
+from identity import IDENTITY_VERSION, IdentityCache
+from hashing import PasswordHasher
+from instrumentation import SQLInstrumentation
+from metrics import Metrics
+from profiler import PARAMETER as PROFILE_PARAMETER, RequestProfiler
+from routing import ReplicaRouter, replica_binds
+from database import EngineTuning, engine_options
+from markupsafe import Markup
+from attendance import (
+    ALREADY_ATTENDING,
+    FULL,
+    REQUESTED,
+    attend,
+    approve_attendee,
+    remove_attendee,
+    reconcile_counts
+)
+from search import event_name_filter, event_name_rank
+from pagination import paginate
+from event_detail import load_event_detail
+from leaderboard import Leaderboard
+from ratings import (
+    add_review,
+    attach_event_ratings,
+    detach_event_ratings,
+    reconcile_ratings,
+    remove_review
+)
+from sessions import ServerSideSessionInterface, revoke_user_sessions
 from flask import (
     redirect,
     request,
@@ -39,7 +83,10 @@ from flask import (
     render_template,
     url_for,
     flash,
-    session
+    session,
+    jsonify,
+    make_response,
+    abort
 )
 from flask_login import (
     LoginManager,
@@ -62,16 +109,34 @@ database = cfg["database"]["name"]
 
 app = Flask(__name__)
 
+database_uri = f'postgresql://{username}:{password}@{ip}:{port}/{database}'
+database_options = engine_options(cfg["database"].get("engine"),
+                                  database_uri)
 app.config.update(
-    SQLALCHEMY_DATABASE_URI=(
-        f'postgresql://{username}:{password}@{ip}:{port}/{database}'
-    ),
+    SQLALCHEMY_DATABASE_URI=database_uri,
+    SQLALCHEMY_ENGINE_OPTIONS=database_options,
+    SQLALCHEMY_BINDS=replica_binds(cfg["database"], database_options),
     SECRET_KEY='secret'
 )
 bcrypt = Bcrypt(app)
+hasher = PasswordHasher(bcrypt, cfg.get("hashing"))
 db.init_app(app)
+migrate = Migrate(app, db)
+replica_router = ReplicaRouter(app, db, cfg["database"])
+engine_tuning = EngineTuning(app, db, cfg["database"].get("engine"))
 login_manager = LoginManager()
 login_manager.init_app(app)
+fragment_cache = FragmentCache(cfg.get("cache"))
+app.session_interface = ServerSideSessionInterface(cfg.get("session"))
+identity_cache = IdentityCache(cfg.get("identity_cache"))
+instrumentation = SQLInstrumentation(app, cfg.get("instrumentation"))
+profiler = RequestProfiler(app, cfg.get("profiler"))
+metrics = Metrics(app, cfg.get("metrics"))
+leaderboard = Leaderboard(app, db, cfg.get("leaderboard"))
+with app.app_context():
+    metrics.watch_pool(db.engine, 'primary')
+    for replica in replica_router.replicas:
+        metrics.watch_pool(db.engines[replica.name], replica.name)
 
 
 def get_month_year():
@@ -86,36 +151,63 @@ def get_month_year():
     return month, year
 
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(user_id)
+def get_month_bounds(month, year):
+    # [first_day, next_month) of the displayed month
+    first_day = dt(year, month, 1)
+    next_month = first_day + timedelta(
+        days=calendar.monthrange(year, month)[1]
+    )
+    return first_day, next_month
 
 
-# timeout for session
-@app.before_request
-def make_session_permanent():
-    session.permanent = True
-    app.permanent_session_lifetime = timedelta(minutes=30)
-    session.modified = True
+def overlaps_month(month, year):
+    # events that touch the month, including those crossing its boundaries
+    first_day, next_month = get_month_bounds(month, year)
+    return and_(
+        Event.start_datetime < next_month,
+        Event.end_datetime >= first_day
+    )
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return identity_cache.load(user_id, session.get(IDENTITY_VERSION))
 
 
 @app.route("/", methods=['GET', 'POST'])
 def index():
     form = FilterForm()
-    if form.validate_on_submit():
+    month, year = get_month_year()
+    month_name = calendar.month_name[month]
+
+    # the list and the search span all months, the calendar shows the
+    # displayed one; hidden events are left out before paginating so pages
+    # stay full
+    filters = [visible_events(current_user)]
+    # event list order, a name search sorts by relevance instead
+    keys = (Event.start_datetime, Event.id)
+
+    filtered = form.validate_on_submit()
+    if filtered:
         name = form.name.data
         category_ids = form.category.data
         place_ids = form.place.data
         approved = form.approved.data
         has_admission = form.has_admission.data
 
-        filters = [
-            Event.name.ilike('%{}%'.format(name)),
-            or_(*[Event.categories.any(
+        if category_ids:
+            filters.append(or_(*[Event.categories.any(
                 id=category_id
-                ) for category_id in category_ids]),
-            or_(*[Event.place.has(id=place_id) for place_id in place_ids])
-        ]
+                ) for category_id in category_ids]))
+
+        if place_ids:
+            filters.append(Event.place_id.in_(place_ids))
+
+        if name:
+            filters.append(event_name_filter(name))
+            rank = event_name_rank(name)
+            if rank is not None:
+                keys = (rank, Event.id)
 
         if approved:
             filters.append(or_(Event.approved.is_(True)))
@@ -123,40 +215,231 @@ def index():
         if has_admission:
             filters.append(or_(Event.admissions.any()))
 
-        # filter
-        events = Event.query.filter(and_(*filters)).all()
+        if form.sort.data == 'rating':
+            keys = (Event.rating_order(), Event.id)
+
+    def render_month_grid():
+        # the calendar shows every event of the month but needs only a few
+        # columns, the list below it is paginated
+        month_events = db.session.execute(
+            db.select(
+                Event.id,
+                Event.name,
+                Event.start_datetime,
+                Event.end_datetime,
+                Event.approved,
+                Event.owner_id
+            ).filter(overlaps_month(month, year), *filters)
+        ).all()
+        return render_template(
+            'month_grid.html',
+            days=build_event_calendar(month_events, month, year,
+                                      current_user),
+            calendar=calendar,
+            month=month,
+            year=year
+        )
+
+    if filtered:
+        month_grid = render_month_grid()
     else:
-        events = Event.query.all()
+        month_grid = fragment_cache.month_grid(
+            month, year, visibility_tier(current_user), render_month_grid
+        )
 
-    month, year = get_month_year()
-    month_name = calendar.month_name[month]
+    page = paginate(
+        Event.query.filter(and_(*filters)),
+        keys,
+        request.values.get('cursor')
+    )
+
+    def render_rows(missing):
+        # one batch load of what the uncached rows show
+        Event.query.filter(
+            Event.id.in_([event.id for event, variant in missing])
+        ).options(*event_list_options()).all()
+        return [
+            render_template('event_row.html', event=event,
+                            unapproved=variant == 'unapproved')
+            for event, variant in missing
+        ]
+
+    rows = [(event, event_row_variant(event, current_user))
+            for event in page.items]
+
+    trending, top_rated = leaderboard.lists()
 
     return render_template(
         'index.html',
         form=form,
-        events=events,
+        page=page,
+        trending=trending,
+        top_rated=top_rated,
+        month_grid=Markup(month_grid),
+        rows=[Markup(row) for row in fragment_cache.event_rows(
+            rows, render_rows
+        )],
         current_user=current_user,
-        calendar=calendar,
         month=month,
         month_name=month_name,
         year=year
     )
 
 
+# longest range the calendar feed serves in one response
+API_MAX_RANGE = timedelta(days=92)
+
+
+def local_datetime(value):
+    # events are stored in naive local time, values with an offset are
+    # converted to it
+    value = dt.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+@app.route("/api/events", methods=['GET'])
+def api_events():
+    # read-only feed of approved events for front-ends and kiosks, cheap to
+    # poll thanks to the ETag
+    try:
+        if 'from' in request.args:
+            range_start = local_datetime(request.args['from'])
+        else:
+            range_start = get_month_bounds(dt.now().month, dt.now().year)[0]
+        if 'to' in request.args:
+            range_end = local_datetime(request.args['to'])
+        else:
+            range_end = range_start + timedelta(days=31)
+    except ValueError:
+        return jsonify(error='from and to have to be ISO 8601 dates'), 400
+
+    if range_end <= range_start or range_end - range_start > API_MAX_RANGE:
+        return jsonify(
+            error='to has to be after from, by at most {} days'.format(
+                API_MAX_RANGE.days)
+        ), 400
+
+    filters = [
+        Event.approved.is_(True),
+        Event.start_datetime < range_end,
+        Event.end_datetime >= range_start
+    ]
+    category_ids = request.args.getlist('category', type=int)
+    if category_ids:
+        filters.append(Event.id.in_(
+            db.select(event_category_table.c.event_id).where(
+                event_category_table.c.category_id.in_(category_ids))
+        ))
+    place_ids = request.args.getlist('place', type=int)
+    if place_ids:
+        filters.append(Event.place_id.in_(place_ids))
+
+    # the count catches deleted events, the stamp everything else
+    last_update, count = db.session.execute(
+        db.select(func.max(Event.updated_at), func.count(Event.id))
+        .where(*filters)
+    ).one()
+    etag = make_etag(range_start, range_end, category_ids, place_ids,
+                     last_update, count)
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    rows = db.session.execute(
+        db.select(
+            Event.id,
+            Event.name,
+            Event.start_datetime,
+            Event.end_datetime,
+            Event.place_id,
+            Place.name.label('place_name')
+        ).join(Place, Event.place_id == Place.id)
+        .where(*filters)
+        .order_by(Event.start_datetime, Event.id)
+    ).all()
+
+    categories = {}
+    if rows:
+        for event_id, category_id in db.session.execute(
+            db.select(
+                event_category_table.c.event_id,
+                event_category_table.c.category_id
+            ).where(
+                event_category_table.c.event_id.in_([row.id for row in rows])
+            )
+        ):
+            categories.setdefault(event_id, []).append(category_id)
+
+    response = jsonify(
+        start=range_start.isoformat(),
+        end=range_end.isoformat(),
+        events=[{
+            'id': row.id,
+            'name': row.name,
+            'start': row.start_datetime.isoformat(),
+            'end': row.end_datetime.isoformat(),
+            'place': {'id': row.place_id, 'name': row.place_name},
+            'categories': sorted(categories.get(row.id, []))
+        } for row in rows]
+    )
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
 @app.route("/users", methods=['GET', 'POST'])
 @login_required
 def users():
     if current_user.role.value < RoleEnum.administrator.value:
         return redirect(url_for('index'))
 
-    users = User.query.all()
     form = UserSearchForm()
+    page = None
 
     if form.validate_on_submit():
         search_term = form.search.data
         users = User.query.filter(User.name == search_term).all()
+    else:
+        page = paginate(
+            User.query,
+            (User.name, User.id),
+            request.args.get('cursor')
+        )
+        users = page.items
+
+    return render_template('users.html', form=form, users=users, page=page)
+
+
+@app.route("/profiles")
+@login_required
+def profiles():
+    if current_user.role.value < RoleEnum.administrator.value:
+        return redirect(url_for('index'))
+
+    return render_template(
+        'profiles.html',
+        profiles=profiler.summaries(),
+        enabled=profiler.enabled,
+        parameter=PROFILE_PARAMETER,
+        token=profiler.token(current_user.id)
+    )
+
+
+@app.route("/profiles/<name>")
+@login_required
+def profile(name):
+    if current_user.role.value < RoleEnum.administrator.value:
+        return redirect(url_for('index'))
 
-    return render_template('users.html', form=form, users=users)
+    report = profiler.report(name)
+    if report is None:
+        abort(404)
+    summary, stats = report
+
+    return render_template('profile.html', summary=summary, stats=stats)
 
 
 @app.route("/edit_user/<int:id>", methods=['GET', 'POST'])
@@ -169,9 +452,19 @@ def edit_user(id):
     form = UserUpdateForm()
 
     if form.validate_on_submit():
-        desired_role = form.role.data
-        user.role = RoleEnum[desired_role]
+        desired_role = RoleEnum[form.role.data]
+        demoted = desired_role.value < user.role.value
+        version = user.identity_version
+        if desired_role != user.role:
+            user.identity_version = version + 1
+        user.role = desired_role
         db.session.commit()
+        identity_cache.invalidate(user.id, version)
+        if demoted:
+            # other workers may still have the old role cached, logging the
+            # user out makes lost privileges and deactivation immediate; the
+            # next login has the new identity version
+            revoke_user_sessions(user.id)
         return redirect(url_for('edit_user', id=id))
 
     form.role.data = user.role.name
@@ -205,7 +498,7 @@ def register():
 
         user = User()
         user.name = username
-        user.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        user.password = hasher.hash(password)
         user.role = RoleEnum.user
         user.insert()
 
@@ -230,14 +523,20 @@ def login():
             )
 
         user = User.query.filter_by(name=username).first()
-        if user and bcrypt.check_password_hash(user.password, password):
+        if user and hasher.check(user.password, password):
             if user.role.value == RoleEnum.deactivated.value:
                 return render_template(
                     'login.html',
                     error="This account has been deactivated"
                 )
             else:
+                if hasher.needs_rehash(user.password):
+                    # hashed with another cost factor, upgrade it now that
+                    # the password is known
+                    user.password = hasher.hash(password)
+                    db.session.commit()
                 login_user(user)
+                session[IDENTITY_VERSION] = user.identity_version
                 return redirect(url_for('home'))
         else:
             return render_template(
@@ -259,9 +558,6 @@ def logout():
 @login_required
 def create_event():
     form = EventForm()
-    # only get categories that are approved
-    form.category_ids.choices = get_category_choices()
-    form.category_ids.choices.pop(0)
     if form.validate_on_submit():
         event = Event()
         event.name = form.name.data
@@ -295,6 +591,8 @@ def create_event():
 
         db.session.add(event)
         db.session.commit()
+        fragment_cache.invalidate_months(event.start_datetime,
+                                         event.end_datetime)
         flash(
             'Event has been created. Wait for the approval from moderators',
             'success'
@@ -319,10 +617,11 @@ def edit_event(id):
         return redirect(url_for('event', id=id))
 
     form = EditEventForm()
-    form.category_ids.choices = get_category_choices()
-    form.category_ids.choices.pop(0)
 
     if form.validate_on_submit():
+        previous_span = (event.start_datetime, event.end_datetime)
+        # the place and categories may change, and their rating totals
+        detach_event_ratings(event)
         event.start_datetime = form.start_datetime.data
         event.end_datetime = form.end_datetime.data
         event.capacity = form.capacity.data
@@ -344,11 +643,16 @@ def edit_event(id):
         event.admissions.clear()
         for admission in admissions:
             event.admissions.append(admission)
+        attach_event_ratings(event)
 
         if event.approved is True:
             flash('You cannot edit approved event!')
             return redirect(url_for('event', id=id))
+        Event.touch(id)
         db.session.commit()
+        fragment_cache.invalidate_months(*previous_span)
+        fragment_cache.invalidate_months(event.start_datetime,
+                                         event.end_datetime)
 
         flash('Your event has been updated!', 'success')
         return redirect(url_for('event', id=event.id))
@@ -375,11 +679,14 @@ def home():
     month, year = get_month_year()
     month_name = calendar.month_name[month]
 
-    user_events = UserEvent.query.filter_by(user_id=current_user.id).all()
+    user_events = UserEvent.query.join(UserEvent.event).filter(
+        UserEvent.user_id == current_user.id,
+        overlaps_month(month, year)
+    ).options(contains_eager(UserEvent.event)).all()
 
     return render_template(
         'home.html',
-        events=user_events,
+        days=build_user_calendar(user_events, month, year),
         calendar=calendar,
         month=month,
         year=year,
@@ -387,18 +694,53 @@ def home():
     )
 
 
+# the event page embeds CSRF tokens, cached copies must not outlive them
+EVENT_PAGE_MAX_AGE = 1800
+
+
+def event_page_validators(id):
+    # (etag, last modified) of the event page for the current viewer, owners
+    # and moderators see extra controls and users their own attendance
+    stamp = db.session.execute(
+        db.select(
+            Event.version,
+            Event.updated_at,
+            Event.start_datetime,
+            Event.end_datetime
+        ).filter_by(id=id)
+    ).one_or_none()
+    if stamp is None:
+        return None, None
+
+    if current_user.is_authenticated:
+        viewer = '{}:{}'.format(current_user.id, current_user.role.name)
+    else:
+        viewer = 'guest'
+    now = dt.now()
+    etag = make_etag(
+        id,
+        stamp.version,
+        viewer,
+        # attending and reviewing depend on whether the event is running
+        stamp.start_datetime > now,
+        stamp.end_datetime < now,
+        int(now.timestamp()) // EVENT_PAGE_MAX_AGE
+    )
+    return etag, stamp.updated_at
+
+
 @app.route('/event/<int:id>', methods=['GET', 'POST'])
 def event(id):
-    event = Event.query.get(id)
-    user_events = UserEvent.query.filter_by(event_id=id).all()
-    now = dt.now()
-    # only events that have user_event.approved = True
-    event_users = UserEvent.query.filter_by(
-        event_id=id,
-        approved=True
-    ).all()
-    filled_capacity = len(event_users)
+    etag = None
+    # a pending flash message is part of the page, render it for real
+    if request.method == 'GET' and '_flashes' not in session:
+        etag, last_modified = event_page_validators(id)
+        if etag is not None and request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
 
+    now = dt.now()
     form = ReviewForm()
     attend_form = EventAttendanceForm()
     cancel_attend_form = EventAttendanceCancelForm()
@@ -409,6 +751,14 @@ def event(id):
     delete_review_form = DeleteReviewForm()
 
     if request.method == 'POST':
+        event = db.session.get(Event, id)
+        if event is None:
+            abort(404)
+        filled_capacity = event.approved_count
+        # the viewer's own attendance, approved or requested
+        attendance = None
+        if current_user.is_authenticated:
+            attendance = db.session.get(UserEvent, (id, current_user.id))
 
         if form.validate_on_submit() and 'submit_review' in request.form:
             review = Review(
@@ -419,7 +769,7 @@ def event(id):
             review.user_id = current_user.id
 
             # review could be added only if current_user is in event.users
-            if current_user not in event.users:
+            if attendance is None:
                 flash('You are not a participant of this event')
                 return redirect(url_for('event', id=id))
 
@@ -428,39 +778,31 @@ def event(id):
                 flash('You already have a review for this event')
                 return redirect(url_for('event', id=id))
 
-            db.session.add(review)
+            add_review(review)
+            Event.touch(id)
             db.session.commit()
             return redirect(url_for('event', id=id))
         elif attend_form.validate_on_submit() and 'attend' in request.form:
-            user_event = UserEvent.query.filter_by(
-                user_id=current_user.id,
-                event_id=id
-            ).all()
-            if event in user_event:
+            if attendance is not None:
                 flash('You are already a participant of this event')
                 return redirect(url_for('event', id=id))
 
-            if filled_capacity == event.capacity:
+            # paid requests take a seat once the owner approves them, until
+            # then the capacity is only checked here
+            needs_approval = bool(event.admissions)
+            if needs_approval and event.capacity is not None and \
+                    filled_capacity >= event.capacity:
                 flash('Sorry, this event is full')
                 return redirect(url_for('event', id=id))
 
-            if event.admissions:
-                user_event = UserEvent(
-                    user_id=current_user.id,
-                    event_id=id,
-                    approved=False
-                )
+            outcome = attend(id, current_user.id, needs_approval)
+            if outcome == FULL:
+                flash('Sorry, this event is full')
+            elif outcome == ALREADY_ATTENDING:
+                flash('You are already a participant of this event')
+            elif outcome == REQUESTED:
                 flash('Your payment has been sent to the event owner.'
                       'Wait for him to confirm the request.')
-            else:
-                user_event = UserEvent(
-                    user_id=current_user.id,
-                    event_id=id
-                    # approved is defaultly True
-                )
-
-            db.session.add(user_event)
-            db.session.commit()
             return redirect(url_for('event', id=id))
 
         elif request_approval_form.validate_on_submit() \
@@ -470,7 +812,11 @@ def event(id):
                 event_id=id
             ).first()
 
-            user_event.approved = True
+            if not approve_attendee(user_event):
+                db.session.rollback()
+                flash('Sorry, this event is full')
+                return redirect(url_for('event', id=id))
+            Event.touch(id)
             db.session.commit()
             return redirect(url_for('event', id=id))
 
@@ -481,13 +827,17 @@ def event(id):
                 event_id=id
             ).first()
 
-            db.session.delete(user_event)
+            remove_attendee(user_event)
+            Event.touch(id)
             db.session.commit()
             return redirect(url_for('event', id=id))
 
         elif attend_form.validate_on_submit() and 'approve' in request.form:
             event.approved = True
+            Event.touch(id)
             db.session.commit()
+            fragment_cache.invalidate_months(event.start_datetime,
+                                             event.end_datetime)
 
         elif delete_event_form.validate_on_submit() \
                 and 'delete_event' in request.form:
@@ -505,22 +855,22 @@ def event(id):
             for review in reviews:
                 db.session.delete(review)
 
+            detach_event_ratings(event)
             db.session.delete(event)
             db.session.commit()
+            fragment_cache.invalidate_months(event.start_datetime,
+                                             event.end_datetime)
             flash('Event has been deleted!', 'success')
             return redirect(url_for('index'))
 
         elif cancel_attend_form.validate_on_submit():
             if 'cancel_attend' in request.form:
-                user_event = UserEvent.query.filter_by(
-                    user_id=current_user.id,
-                    event_id=id
-                ).first()
-                if user_event is None:
+                if attendance is None:
                     flash('You are not a participant of this event')
                     return redirect(url_for('event', id=id))
 
-                db.session.delete(user_event)
+                remove_attendee(attendance)
+                Event.touch(id)
                 db.session.commit()
                 return redirect(url_for('event', id=id))
         elif delete_review_form.validate_on_submit and 'delete_review' \
@@ -535,11 +885,18 @@ def event(id):
                 flash('You can delete only your own reviews')
                 return redirect(url_for('home'))
 
-            db.session.delete(review)
+            remove_review(review)
+            Event.touch(id)
             db.session.commit()
             flash('Review has been deleted!', 'success')
             return redirect(url_for('event', id=id))
 
+    detail = load_event_detail(id, current_user, now,
+                               request.args.get('cursor'))
+    if detail is None:
+        abort(404)
+    event = detail.event
+
     # don't show unapproved events to users who are not owners
     if (not event.approved and event.owner_id != current_user.id and
             current_user.role.value < RoleEnum.moderator.value):
@@ -548,14 +905,25 @@ def event(id):
             'that has not been created by you!')
         return redirect(url_for('index'))
 
-    return render_template('event.html', event=event, now=now, form=form,
-                           filled_capacity=filled_capacity,
-                           attend_form=attend_form,
-                           cancel_attend_form=cancel_attend_form,
-                           approval_form=approval_form,
-                           request_approval_form=request_approval_form,
-                           user_events=user_events,
-                           delete_form=delete_event_form)
+    response = make_response(render_template(
+        'event.html', event=event, now=now, form=form,
+        filled_capacity=event.approved_count,
+        attend_form=attend_form,
+        cancel_attend_form=cancel_attend_form,
+        approval_form=approval_form,
+        request_approval_form=request_approval_form,
+        user_events=detail.requests,
+        reviews=detail.reviews,
+        attendance=detail.attendance,
+        delete_form=delete_event_form
+    ))
+    if etag is not None:
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+    return response
 
 
 @app.route('/propose_place', methods=['GET', 'POST'])
@@ -600,16 +968,23 @@ def propose_place():
 @app.route('/places', methods=['GET'])
 @login_required
 def places():
-    places = []
-    if current_user.role == RoleEnum.moderator or \
-            current_user.role == RoleEnum.administrator:
-        places = Place.query.all()
-    else:
+    query = Place.query
+    if current_user.role != RoleEnum.moderator and \
+            current_user.role != RoleEnum.administrator:
         # user will see only approved places
-        places = Place.query.filter_by(approved=True).all()
+        query = query.filter_by(approved=True)
+
+    sort = request.args.get('sort')
+    if sort == 'rating':
+        keys = (Place.rating_order(), Place.id)
+    else:
+        sort, keys = None, (Place.name, Place.id)
 
-    events = Event.query.all()
-    return render_template('places.html', places=places, events=events)
+    page = paginate(query, keys, request.args.get('cursor'))
+    events = upcoming_events(Place, [place.id for place in page.items],
+                             current_user, dt.now())
+    return render_template('places.html', places=page.items, page=page,
+                           events=events, sort=sort)
 
 
 @app.route('/approve_place/<int:id>', methods=['GET', 'POST'])
@@ -625,20 +1000,27 @@ def approve_place(id):
 @app.route('/categories', methods=['GET'])
 @login_required
 def categories():
-    categories = []
-    events = Event.query.all()
-
-    if current_user.role == RoleEnum.moderator or \
-            current_user.role == RoleEnum.administrator:
-        categories = Category.query.all()
-    else:
+    query = Category.query.options(*category_list_options())
+    if current_user.role != RoleEnum.moderator and \
+            current_user.role != RoleEnum.administrator:
         # user will see only approved categories
-        categories = Category.query.filter_by(approved=True).all()
+        query = query.filter_by(approved=True)
 
+    page = paginate(
+        query,
+        # name is nullable, row comparison needs a value
+        (func.coalesce(Category.name, ''), Category.id),
+        request.args.get('cursor')
+    )
+    events = upcoming_events(
+        Category, [category.id for category in page.items],
+        current_user, dt.now()
+    )
     return render_template(
         'categories.html',
-        categories=categories,
-        events=events)
+        categories=page.items,
+        events=events,
+        page=page)
 
 
 @app.route('/approve_category/<int:id>', methods=['GET', 'POST'])
@@ -647,6 +1029,7 @@ def approve_category(id):
     category = Category.query.get_or_404(id)
     category.approved = True
     db.session.commit()
+    bump_category_version()
 
     return redirect(url_for('categories'))
 
@@ -678,6 +1061,7 @@ def propose_category():
 
         db.session.add(category)
         db.session.commit()
+        bump_category_version()
         flash('Your category proposal has been submitted.')
         return redirect(url_for('index'))
     return render_template('propose_category.html', form=form)
@@ -686,7 +1070,12 @@ def propose_category():
 @app.route('/my_reviews', methods=['GET', 'POST'])
 @login_required
 def my_reviews():
-    my_reviews = User.query.get(current_user.id).reviews
+    # one query for the reviews and their events
+    my_reviews = db.session.execute(
+        db.select(Review).filter_by(user_id=current_user.id)
+        .options(joinedload(Review.event))
+        .order_by(Review.id)
+    ).scalars().all()
     form = DeleteReviewForm()
 
     if form.validate_on_submit():
@@ -696,7 +1085,8 @@ def my_reviews():
             flash('You can delete only your own reviews')
             return redirect(url_for('home'))
 
-        db.session.delete(review)
+        remove_review(review)
+        Event.touch(review.event_id)
         db.session.commit()
         flash('Your review has been deleted!', 'success')
         return redirect(url_for('my_reviews'))
@@ -706,3 +1096,40 @@ def my_reviews():
         reviews=my_reviews,
         form=form
     )
+
+
+@app.cli.command('reconcile-attendance')
+def reconcile_attendance():
+    """Recount the attendee counters of every event."""
+    click.echo('Repaired {} events'.format(reconcile_counts()))
+
+
+@app.cli.command('reconcile-ratings')
+def reconcile_rating_totals():
+    """Recompute the rating totals of events, places and categories."""
+    click.echo('Repaired {} rows'.format(reconcile_ratings()))
+
+
+@app.cli.command('refresh-leaderboard')
+def refresh_leaderboard():
+    """Refresh the trending and top rated events."""
+    if not leaderboard.refresh():
+        click.echo('Another refresh is running')
+
+
+@app.cli.command('purge-sessions')
+def purge_sessions():
+    """Remove expired sessions from the session store."""
+    click.echo('Removed {} sessions'.format(
+        app.session_interface.store.purge()))
+
+
+@app.cli.command('revoke-sessions')
+@click.argument('name')
+def revoke_sessions(name):
+    """Log the user NAME out of all their sessions."""
+    user = User.query.filter_by(name=name).first()
+    if user is None:
+        click.echo('No user named {}'.format(name))
+        return
+    click.echo('Revoked {} sessions'.format(revoke_user_sessions(user.id)))
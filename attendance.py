@@ -0,0 +1,131 @@
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import IntegrityError
+
+from models import Event, UserEvent, db
+
+# outcomes of attend()
+ATTENDING = 'attending'
+REQUESTED = 'requested'
+FULL = 'full'
+ALREADY_ATTENDING = 'already attending'
+
+
+def skip_counter_trigger():
+    # the functions below keep the counters of Event themselves, stop the
+    # event_user trigger from counting the same change twice; SET LOCAL
+    # lasts until the end of the current transaction
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text("SET LOCAL iis.attendance_trigger = 'off'"))
+
+
+def change_counts(event_id, approved=0, pending=0):
+    db.session.execute(
+        db.update(Event).where(Event.id == event_id).values(
+            approved_count=Event.approved_count + approved,
+            pending_count=Event.pending_count + pending
+        )
+    )
+
+
+def reserve_seat(event_id):
+    # takes a seat unless the event is full, the check and the increment are
+    # one statement and the row lock it takes serializes concurrent
+    # reservations of the event until commit, so it can never oversell;
+    # returns whether a seat was taken
+    result = db.session.execute(
+        db.update(Event).where(
+            Event.id == event_id,
+            or_(Event.capacity.is_(None),
+                Event.approved_count < Event.capacity)
+        ).values(
+            approved_count=Event.approved_count + 1
+        ).execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def add_attendee(event_id, user_id, approved=True):
+    # None when there is no seat left, requests waiting for approval take
+    # their seat once approved
+    skip_counter_trigger()
+    if approved:
+        if not reserve_seat(event_id):
+            return None
+    else:
+        change_counts(event_id, pending=1)
+    user_event = UserEvent(
+        user_id=user_id,
+        event_id=event_id,
+        approved=approved
+    )
+    db.session.add(user_event)
+    return user_event
+
+
+def attend(event_id, user_id, needs_approval=False):
+    # the whole attend transaction, commits and returns one of the outcomes
+    # above
+    user_event = add_attendee(event_id, user_id, approved=not needs_approval)
+    if user_event is None:
+        db.session.rollback()
+        return FULL
+    Event.touch(event_id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request of the same user got there first
+        db.session.rollback()
+        return ALREADY_ATTENDING
+    return REQUESTED if needs_approval else ATTENDING
+
+
+def approve_attendee(user_event):
+    # False when the event got full in the meantime
+    if user_event.approved:
+        return True
+    skip_counter_trigger()
+    if not reserve_seat(user_event.event_id):
+        return False
+    user_event.approved = True
+    change_counts(user_event.event_id, pending=-1)
+    return True
+
+
+def remove_attendee(user_event):
+    skip_counter_trigger()
+    if user_event.approved:
+        change_counts(user_event.event_id, approved=-1)
+    else:
+        change_counts(user_event.event_id, pending=-1)
+    db.session.delete(user_event)
+
+
+def reconcile_counts():
+    # recount every event from event_user, returns the number of repaired
+    # events
+    counts = db.select(
+        UserEvent.event_id,
+        func.count(case((UserEvent.approved.is_(True), 1))).label(
+            'approved'),
+        func.count(case((UserEvent.approved.is_(False), 1))).label(
+            'pending')
+    ).group_by(UserEvent.event_id).subquery()
+
+    approved = func.coalesce(counts.c.approved, 0)
+    pending = func.coalesce(counts.c.pending, 0)
+    drifted = db.session.execute(
+        db.select(Event.id, approved, pending)
+        .outerjoin(counts, counts.c.event_id == Event.id)
+        .where((Event.approved_count != approved) |
+               (Event.pending_count != pending))
+    ).all()
+
+    for event_id, approved_count, pending_count in drifted:
+        db.session.execute(
+            db.update(Event).where(Event.id == event_id).values(
+                approved_count=approved_count,
+                pending_count=pending_count
+            )
+        )
+    db.session.commit()
+    return len(drifted)
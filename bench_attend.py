@@ -0,0 +1,105 @@
+"""Throughput of the attend path against the configured Postgres.
+
+Creates an event and a crowd of users, lets concurrent threads attend the
+event through attendance.attend() and reports attempts and reservations per
+second. Everything it creates is removed afterwards. That the event is not
+oversold is checked by tests/test_attendance.py.
+
+    python bench_attend.py --users 2000 --capacity 500 --threads 12
+"""
+import argparse
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app import app
+from attendance import ATTENDING, attend
+from models import Event, Place, RoleEnum, User, UserEvent, db
+
+
+def setup(users, capacity):
+    place = Place.query.first()
+    owner = User(name='bench-owner', password='!', role=RoleEnum.user)
+    db.session.add(owner)
+    db.session.flush()
+    event = Event(
+        name='bench-attend-{}'.format(int(time.time())),
+        start_datetime=datetime.now() + timedelta(days=1),
+        end_datetime=datetime.now() + timedelta(days=1, hours=2),
+        capacity=capacity,
+        approved=True,
+        owner_id=owner.id,
+        place_id=place.id
+    )
+    db.session.add(event)
+    db.session.execute(db.insert(User), [
+        {'name': 'bench-user-{}'.format(i), 'password': '!',
+         'role': RoleEnum.user}
+        for i in range(users)
+    ])
+    db.session.commit()
+    user_ids = db.session.execute(
+        db.select(User.id).where(User.name.like('bench-user-%'))
+    ).scalars().all()
+    return event.id, owner.id, user_ids
+
+
+def teardown(event_id, owner_id):
+    db.session.execute(db.delete(UserEvent).where(
+        UserEvent.event_id == event_id))
+    db.session.execute(db.delete(Event).where(Event.id == event_id))
+    db.session.execute(db.delete(User).where(
+        User.name.like('bench-user-%') | (User.id == owner_id)))
+    db.session.commit()
+
+
+def worker(event_id, user_ids, outcomes, lock):
+    counts = {}
+    with app.app_context():
+        for user_id in user_ids:
+            outcome = attend(event_id, user_id)
+            counts[outcome] = counts.get(outcome, 0) + 1
+    with lock:
+        for outcome, count in counts.items():
+            outcomes[outcome] = outcomes.get(outcome, 0) + count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--capacity', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=12)
+    args = parser.parse_args()
+
+    with app.app_context():
+        event_id, owner_id, user_ids = setup(args.users, args.capacity)
+
+    outcomes = {}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(
+            event_id, user_ids[i::args.threads], outcomes, lock))
+        for i in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        teardown(event_id, owner_id)
+
+    attempts = sum(outcomes.values())
+    print('{} attempts by {} threads in {:.2f}s: {:.0f} attempts/s, '
+          '{:.0f} reservations/s'.format(
+              attempts, args.threads, elapsed, attempts / elapsed,
+              outcomes.get(ATTENDING, 0) / elapsed))
+    print('outcomes: {}'.format(outcomes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Password checks per second through the hashing pool at several costs.
+
+Needs no database. Every cost factor gets a fresh PasswordHasher with
+--threads pool threads and as many client threads, which check a password
+against a hash of that cost for --seconds.
+
+    python bench_hashing.py --rounds 10 11 12 13 --threads 4
+"""
+import argparse
+import os
+import threading
+import time
+
+from flask_bcrypt import Bcrypt
+
+from hashing import HashingBusy, PasswordHasher
+
+PASSWORD = 'Tester123*'
+
+
+def client(hasher, password_hash, deadline, counts, lock):
+    checks = busy = 0
+    while time.perf_counter() < deadline:
+        try:
+            hasher.check(password_hash, PASSWORD)
+            checks += 1
+        except HashingBusy:
+            busy += 1
+    with lock:
+        counts['checks'] += checks
+        counts['busy'] += busy
+
+
+def measure(bcrypt, rounds, threads, seconds):
+    hasher = PasswordHasher(bcrypt, {
+        'rounds': rounds, 'workers': threads, 'max_pending': threads
+    })
+    password_hash = hasher.hash(PASSWORD)
+    counts = {'checks': 0, 'busy': 0}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    clients = [
+        threading.Thread(target=client, args=(
+            hasher, password_hash, started + seconds, counts, lock))
+        for _ in range(threads)
+    ]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    hasher.pool.shutdown()
+    return counts['checks'] / elapsed, counts['busy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, nargs='+',
+                        default=[10, 11, 12, 13])
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    bcrypt = Bcrypt()
+    cores = min(args.threads, os.cpu_count() or 1)
+    print('{} threads on {} cores'.format(args.threads, os.cpu_count()))
+    print('{:>6} {:>12} {:>15} {:>10}'.format(
+        'rounds', 'logins/s', 'logins/s/core', 'ms/login'))
+    for rounds in args.rounds:
+        rate, busy = measure(bcrypt, rounds, args.threads, args.seconds)
+        print('{:>6} {:>12.1f} {:>15.1f} {:>10.1f}{}'.format(
+            rounds, rate, rate / cores, 1000 * cores / rate,
+            '  ({} refused)'.format(busy) if busy else ''))
+
+
+if __name__ == "__main__":
+    main()
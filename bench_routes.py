@@ -0,0 +1,241 @@
+"""Route latency and query count benchmark.
+
+Drives the Flask test client through the main pages and records p50/p95
+latency and the number of SQL statements of every route. Fails when a route
+issues more statements than its budget, or when its median got slower than
+in the stored baseline by more than --threshold plus --slack-ms. p95 is only
+reported, it is too noisy to gate on.
+
+With --scales the database is refilled by fill_db.py at each scale first,
+which EMPTIES ALL TABLES; without it the data already there is measured.
+
+    python bench_routes.py --scales small medium
+    python bench_routes.py --scales small --save-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import event, func
+
+import app as application
+import fill_db
+from models import Event, RoleEnum, Review, User, db
+from utils import bump_category_version
+
+SCALES = {
+    'small': ['--users', '1k', '--events', '500', '--attendance', '10k',
+              '--reviews', '2k'],
+    'medium': ['--users', '10k', '--events', '5k', '--attendance', '200k',
+               '--reviews', '100k'],
+    'large': ['--users', '100k', '--events', '50k', '--attendance', '2M',
+              '--reviews', '1M'],
+}
+
+# most SQL statements a route may issue on a warm worker, the session store
+# lookup included
+QUERY_BUDGETS = {
+    'index': 4,
+    'index_filtered': 8,
+    'event': 6,
+    'home': 3,
+    'places': 6,
+    'categories': 6,
+    'my_reviews': 4,
+}
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'bench_baseline.json')
+
+
+class StatementCounter:
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.before_execute)
+
+    def before_execute(self, *args):
+        self.count += 1
+
+
+def reset_caches():
+    # the data changed under the process' caches
+    bump_category_version()
+    application.fragment_cache.backend.entries.clear()
+    application.identity_cache.backend.entries.clear()
+
+
+def pick_fixtures():
+    # a busy event of the current month, its main category and the user who
+    # wrote most reviews
+    month, year = application.dt.now().month, application.dt.now().year
+    busy_event = db.session.execute(
+        db.select(Event)
+        .where(application.overlaps_month(month, year),
+               Event.approved.is_(True))
+        .order_by(Event.approved_count.desc())
+        .limit(1)
+    ).scalar()
+    if busy_event is None:
+        busy_event = db.session.execute(
+            db.select(Event).order_by(Event.approved_count.desc()).limit(1)
+        ).scalar()
+    reviewer = db.session.execute(
+        db.select(User.name)
+        .join(Review, Review.user_id == User.id)
+        .where(User.role == RoleEnum.user)
+        .group_by(User.id)
+        .order_by(func.count(Review.id).desc())
+        .limit(1)
+    ).scalar() or 'tester'
+    return {
+        'event_id': busy_event.id,
+        'category_id': busy_event.categories[0].id,
+        'term': busy_event.name.split()[0][:5],
+        'user': reviewer,
+    }
+
+
+def routes(fixtures):
+    return [
+        ('index', 'get', '/', None),
+        ('index_filtered', 'post', '/', {
+            'name': fixtures['term'],
+            'category': [fixtures['category_id']],
+        }),
+        ('event', 'get', '/event/{}'.format(fixtures['event_id']), None),
+        ('home', 'get', '/home', None),
+        ('places', 'get', '/places', None),
+        ('categories', 'get', '/categories', None),
+        ('my_reviews', 'get', '/my_reviews', None),
+    ]
+
+
+def measure(client, counter, method, url, data, warmup, repeat):
+    samples = []
+    statements = 0
+    for i in range(warmup + repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data=data)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError('{} {} answered {}'.format(
+                method.upper(), url, response.status_code))
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+            statements = max(statements, counter.count)
+    percentiles = statistics.quantiles(samples, n=100)
+    return {
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(percentiles[94], 2),
+        'queries': statements,
+    }
+
+
+def run_scale(scale, args, counter):
+    if scale != 'current':
+        fill_args = fill_db.build_parser().parse_args(
+            SCALES[scale] + ['--truncate', '--seed', str(args.seed)])
+        if fill_db.fill(fill_args) != 0:
+            raise RuntimeError('filling the database failed')
+    with application.app.app_context():
+        reset_caches()
+        fixtures = pick_fixtures()
+        db.session.remove()
+
+    client = application.app.test_client()
+    login = client.post('/login', data={
+        'name': fixtures['user'], 'password': fill_db.GENERATED_PASSWORD
+    })
+    if login.status_code != 302:
+        raise RuntimeError('cannot log in as {}'.format(fixtures['user']))
+
+    results = {}
+    for name, method, url, data in routes(fixtures):
+        results[name] = measure(client, counter, method, url, data,
+                                args.warmup, args.repeat)
+        print('{:>8} {:>15} p50 {:>8.1f}ms p95 {:>8.1f}ms {:>3} queries'
+              .format(scale, name, results[name]['p50_ms'],
+                      results[name]['p95_ms'], results[name]['queries']))
+    return results
+
+
+def check(results, baseline, args):
+    failures = []
+    for scale, routes_results in results.items():
+        for name, result in routes_results.items():
+            budget = QUERY_BUDGETS.get(name)
+            if budget is not None and result['queries'] > budget:
+                failures.append('{} {}: {} queries, budget {}'.format(
+                    scale, name, result['queries'], budget))
+            if args.budgets_only:
+                continue
+            base = baseline.get(scale, {}).get(name)
+            if base and result['p50_ms'] > base['p50_ms'] * (
+                    1 + args.threshold) + args.slack_ms:
+                failures.append('{} {}: p50 {:.1f}ms, baseline {:.1f}ms'
+                                .format(scale, name, result['p50_ms'],
+                                        base['p50_ms']))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--scales', nargs='+', choices=sorted(SCALES),
+                        help='refill the database at these scales, '
+                        'EMPTIES ALL TABLES')
+    parser.add_argument('--seed', type=int, default=2023)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='allowed median slowdown against the baseline, '
+                        '0.5 is 50%% (default)')
+    parser.add_argument('--slack-ms', type=float, default=5,
+                        help='allowed slowdown on top of the threshold, '
+                        'keeps the fast routes from failing on noise')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    parser.add_argument('--budgets-only', action='store_true',
+                        help='check the query budgets only, for machines '
+                        'with noisy timings')
+    args = parser.parse_args()
+
+    application.app.config['WTF_CSRF_ENABLED'] = False
+    with application.app.app_context():
+        counter = StatementCounter(db.engine)
+
+    results = {}
+    for scale in args.scales or ['current']:
+        results[scale] = run_scale(scale, args, counter)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('baseline saved to {}'.format(args.baseline))
+        return 0
+
+    failures = check(results, baseline, args)
+    for failure in failures:
+        print('FAILED: {}'.format(failure))
+    if not failures:
+        print('OK')
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
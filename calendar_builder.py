@@ -0,0 +1,107 @@
+from collections import namedtuple
+from datetime import date, timedelta
+import calendar
+
+from sqlalchemy import and_, or_
+
+from models import Event, RoleEnum
+
+# one button in a calendar cell
+CalendarEntry = namedtuple('CalendarEntry', ['id', 'label', 'css_class'])
+
+
+def month_days(month, year):
+    first_day = date(year, month, 1)
+    last_day = first_day + timedelta(
+        days=calendar.monthrange(year, month)[1] - 1
+    )
+    return first_day, last_day
+
+
+def spread_over_days(spans, month, year):
+    # spans are (start_datetime, end_datetime, entry) triples, every entry
+    # is put into each day of the month its span covers
+    first_day, last_day = month_days(month, year)
+    days = {}
+    for start, end, entry in spans:
+        if start is None or end is None:
+            continue
+        start = max(start.date(), first_day)
+        end = min(end.date(), last_day)
+        for day in range(start.day, end.day + 1):
+            days.setdefault(day, []).append(entry)
+    return days
+
+
+def can_see_unapproved(event, user):
+    if not user.is_authenticated:
+        return False
+    return event.owner_id == user.id or \
+        user.role.value >= RoleEnum.moderator.value
+
+
+def visibility_tier(user):
+    # users seeing the same events share cached calendars
+    if not user.is_authenticated:
+        return 'guest'
+    if user.role.value >= RoleEnum.moderator.value:
+        return 'staff'
+    # their own unapproved events are visible to them only
+    return 'user-{}'.format(user.id)
+
+
+def visible_events(user):
+    # the events event_row_variant() shows to the user, as a filter
+    if not user.is_authenticated:
+        return Event.approved.is_(True)
+    if user.role.value >= RoleEnum.moderator.value:
+        return Event.approved.is_not(None)
+    return or_(
+        Event.approved.is_(True),
+        and_(Event.approved.is_(False), Event.owner_id == user.id)
+    )
+
+
+def event_row_variant(event, user):
+    # how the event list shows the event to the user, None when hidden
+    if event.approved is True:
+        return 'approved'
+    if event.approved is False and can_see_unapproved(event, user):
+        return 'unapproved'
+    return None
+
+
+def build_event_calendar(events, month, year, user):
+    # {day: [CalendarEntry]} of the events visible to the user
+    spans = []
+    for event in events:
+        if event.approved is True:
+            css_class = 'event'
+        elif event.approved is False and can_see_unapproved(event, user):
+            css_class = 'event-unapproved'
+        else:
+            continue
+        spans.append((
+            event.start_datetime,
+            event.end_datetime,
+            CalendarEntry(event.id, event.name, css_class)
+        ))
+    return spread_over_days(spans, month, year)
+
+
+def build_user_calendar(user_events, month, year):
+    # {day: [CalendarEntry]} of the approved events the user attends or
+    # has requested to attend
+    spans = []
+    for user_event in user_events:
+        event = user_event.event
+        if not event.approved:
+            continue
+        if user_event.approved:
+            entry = CalendarEntry(event.id, event.name, 'event')
+        else:
+            entry = CalendarEntry(
+                event.id, event.name + ' (requested)', 'event-waiting'
+            )
+        spans.append((event.start_datetime, event.end_datetime, entry))
+    return spread_over_days(spans, month, year)
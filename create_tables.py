@@ -1,4 +1,7 @@
-from app import app, db
+from flask_migrate import upgrade
 
+from app import app
+
+# same as `flask db upgrade`, brings the schema to the latest revision
 with app.app_context():
-    db.create_all()
+    upgrade()
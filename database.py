@@ -0,0 +1,99 @@
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+
+def engine_options(config, url):
+    # SQLALCHEMY_ENGINE_OPTIONS of the database.engine section in config.yaml
+    config = config or {}
+    options = {'pool_pre_ping': config.get('pool_pre_ping', True)}
+    if config.get('null_pool', False):
+        # PgBouncer pools already, keep no idle connections in every worker
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            pool_size=config.get('pool_size', 5),
+            max_overflow=config.get('max_overflow', 10),
+            pool_timeout=config.get('pool_timeout', 30),
+            pool_recycle=config.get('pool_recycle', 1800)
+        )
+    connect_args = {'application_name': config.get('application_name', 'iis')}
+    if config.get('pgbouncer', False) and \
+            make_url(url).get_driver_name() == 'psycopg':
+        # psycopg 3 prepares repeated statements on the server, which breaks
+        # when PgBouncer hands the next transaction to another server
+        # connection; psycopg2 never prepares
+        connect_args['prepare_threshold'] = None
+    options['connect_args'] = connect_args
+    return options
+
+
+# Statement timeouts and pool warm up for every engine of db, the replicas
+# included. Requests run with statement_timeout milliseconds, or with the
+# timeout of their endpoint in route_statement_timeouts; CLI commands,
+# migrations and fill_db.py run without one. Behind PgBouncer in transaction
+# mode a server connection changes hands after every transaction, so no
+# session state may be left on it and the timeout is set with SET LOCAL in
+# every transaction of a request instead of once per connection.
+class EngineTuning:
+
+    def __init__(self, app, db, config=None):
+        config = config or {}
+        self.app = app
+        self.db = db
+        self.pgbouncer = config.get('pgbouncer', False)
+        self.statement_timeout = config.get('statement_timeout', 0)
+        self.route_timeouts = config.get('route_statement_timeouts') or {}
+        self.warm_up_connections = config.get('warm_up', 0)
+        self.warming = False
+        with app.app_context():
+            for engine in db.engines.values():
+                if not self.pgbouncer:
+                    event.listen(engine, 'checkout', self.on_checkout)
+                event.listen(engine, 'begin', self.on_begin)
+
+    def route_timeout(self):
+        # the endpoint's own timeout, None when it uses the default
+        if not has_request_context():
+            return None
+        return self.route_timeouts.get(request.endpoint)
+
+    def on_checkout(self, dbapi_connection, record, proxy):
+        # session level timeout, SET only when the connection has another
+        wanted = self.statement_timeout \
+            if has_request_context() or self.warming else 0
+        if record.info.get('statement_timeout', 0) == wanted:
+            return
+        cursor = dbapi_connection.cursor()
+        cursor.execute('SET statement_timeout = %s', (wanted,))
+        cursor.close()
+        dbapi_connection.commit()
+        record.info['statement_timeout'] = wanted
+
+    def on_begin(self, connection):
+        timeout = self.route_timeout()
+        if timeout is None and self.pgbouncer and has_request_context():
+            timeout = self.statement_timeout
+        if timeout is not None:
+            connection.exec_driver_sql(
+                'SET LOCAL statement_timeout = {:d}'.format(timeout))
+
+    def warm_up(self):
+        # opens the pools' first connections before the first request, run
+        # in every worker process after it started
+        if not self.warm_up_connections:
+            return
+        self.warming = True
+        try:
+            with self.app.app_context():
+                for engine in self.db.engines.values():
+                    if isinstance(engine.pool, NullPool):
+                        continue
+                    count = min(self.warm_up_connections,
+                                engine.pool.size())
+                    connections = [engine.connect() for _ in range(count)]
+                    for connection in connections:
+                        connection.close()
+        finally:
+            self.warming = False
@@ -0,0 +1,10 @@
+#!/bin/sh
+# streaming standby of $PRIMARY_HOST, started from a fresh base backup
+set -e
+rm -rf /tmp/standby
+until pg_basebackup -h "$PRIMARY_HOST" -p "${PRIMARY_PORT:-5432}" -U admin \
+        -D /tmp/standby -R -X stream; do
+    sleep 1
+done
+chmod 700 /tmp/standby
+exec postgres -D /tmp/standby -p "${PORT:-5432}"
@@ -0,0 +1,3 @@
+#!/bin/sh
+# init script of the primary, lets the replica stream its WAL
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
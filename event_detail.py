@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+from sqlalchemy import and_
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import Category, Event, Review, UserEvent, db
+from pagination import paginate
+
+REVIEWS_PER_PAGE = 20
+
+# what the event page shows: the event with its owner, place, categories
+# and admissions, a pagination.Page of reviews (None until the event is
+# over), the viewer's own UserEvent and, for the owner, the requests
+# waiting for approval
+EventDetail = namedtuple(
+    'EventDetail', ['event', 'reviews', 'attendance', 'requests']
+)
+
+
+def event_detail_options():
+    return (
+        joinedload(Event.owner),
+        joinedload(Event.place),
+        selectinload(Event.categories).joinedload(Category.parent),
+        selectinload(Event.admissions),
+    )
+
+
+# Loads the event page in at most five queries whatever the number of its
+# attendees and reviews: the event with the viewer's attendance, its
+# categories, its admissions, one page of reviews with their authors and
+# the pending requests for the owner. Attendance is counted on the event row
+# itself (approved_count, pending_count). None when there is no such event.
+def load_event_detail(event_id, viewer, now, cursor=None,
+                      per_page=REVIEWS_PER_PAGE):
+    viewer_id = viewer.id if viewer.is_authenticated else None
+    query = db.select(Event, UserEvent).outerjoin(UserEvent, and_(
+        UserEvent.event_id == Event.id,
+        UserEvent.user_id == viewer_id
+    )).filter(Event.id == event_id).options(
+        *event_detail_options()
+    ).execution_options(populate_existing=True)
+    row = db.session.execute(query).one_or_none()
+    if row is None:
+        return None
+    event, attendance = row
+
+    # reviews are shown once the event is over
+    reviews = None
+    if event.approved and event.end_datetime is not None and \
+            event.end_datetime < now:
+        reviews = paginate(
+            Review.query.options(joinedload(Review.user)).filter_by(
+                event_id=event_id
+            ),
+            (Review.id,),
+            cursor,
+            per_page
+        )
+
+    requests = []
+    if viewer_id is not None and viewer_id == event.owner_id:
+        requests = UserEvent.query.options(
+            joinedload(UserEvent.user)
+        ).filter_by(event_id=event_id, approved=False).all()
+
+    return EventDetail(event, reviews, attendance, requests)
@@ -1,347 +1,432 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
-from models import (
-        User, Category, Event, Place, Review, Admission, RoleEnum, UserEvent
-)
-from yaml import load, FullLoader
-from app import bcrypt
-
-with open("config.yaml") as f:
-    cfg = load(f, Loader=FullLoader)
-
-username = cfg["user"]["name"]
-password = cfg["user"]["password"]
-
-ip = cfg["server"]["IP"]
-port = cfg["server"]["port"]
-
-database = cfg["database"]["name"]
-
-
-class Base(DeclarativeBase):
-    pass
-
-
-db = SQLAlchemy(model_class=Base)
-
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = (
-    f'postgresql://{username}:{password}@{ip}:{port}/{database}'
-)
-
-db.init_app(app)
-
-app.app_context().push()
-
-if __name__ == "__main__":
-    incheba = Place(
-            name="Incheba expo",
-            address="Viedenská cesta 3409/5, 851 01 Petržalka",
-            description="multifunkčná hala",
-            approved=True
-            )
-
-    vodaren = Place(
-            name="Vodárenské múzeum",
-            address="Devínska cesta 5364, 841 04 Karlova Ves",
-            description="múzeum vodárenstva",
-            approved=True
-            )
-
-    hala = Place(
-            name="ARENA BRNO",
-            address="603 00 Brno-střed, Česko",
-            description="plánovaná multifunkční hala",
-            approved=False
-            )
-    vystaviste = Place(
-            name="Brněnské výstaviště",
-            address="603 00 Brno-Pisárky, Česko",
-            description="český výstavní areál",
-            approved=True
-            )
-    d105 = Place(
-                name="D105",
-                address="Kolejní 2, 612 00 Brno-Královo Pole, Česko",
-                description="posluchárna",
-                approved=True
+"""Fill the database with synthetic data.
+
+Users, places, categories, events, attendance and reviews are generated with
+skewed, production like distributions and bulk loaded with COPY. A few power
+users own most events, a few places and categories host most of them,
+attendance per event is heavy tailed and ratings lean to the top of the
+scale. The same --seed and --anchor give the same data.
+
+    python fill_db.py --users 100k --events 50k --reviews 1M --truncate
+
+Besides the generated users there are the accounts tester, popocatepepl and
+hraskovie (password Tester123*), moderator (modTester123*) and admin
+(adminTester123*).
+"""
+import argparse
+import csv
+import io
+import math
+import random
+import sys
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import text
+
+from app import app, hasher, leaderboard
+from models import RoleEnum, db
+from ratings import reconcile_ratings
+
+ACCOUNTS = [
+    ('tester', 'Tester123*', RoleEnum.user),
+    ('popocatepepl', 'Tester123*', RoleEnum.user),
+    ('hraskovie', 'Tester123*', RoleEnum.user),
+    ('moderator', 'modTester123*', RoleEnum.moderator),
+    ('admin', 'adminTester123*', RoleEnum.administrator),
+]
+
+CATEGORIES = {
+    'šport': ['hokej', 'futbal', 'tenis', 'beh', 'cyklistika', 'plávanie'],
+    'hudba': ['symfónia', 'rock', 'jazz', 'pop', 'folk', 'elektronika'],
+    'vzdelanie': ['prednáška', 'workshop', 'konferencia', 'seminár'],
+    'divadlo': ['činohra', 'opera', 'balet', 'muzikál'],
+    'film': ['premiéra', 'festival', 'dokument'],
+    'jedlo': ['degustácia', 'trh', 'kurz varenia'],
+    'technológie': ['meetup', 'hackathon', 'veletrh'],
+    'umenie': ['výstava', 'vernisáž', 'aukcia'],
+}
+
+CITIES = [
+    ('Bratislava', '811 01'), ('Brno', '602 00'), ('Praha', '110 00'),
+    ('Košice', '040 01'), ('Ostrava', '702 00'), ('Žilina', '010 01'),
+    ('Olomouc', '779 00'), ('Nitra', '949 01'), ('Plzeň', '301 00'),
+    ('Banská Bystrica', '974 01'),
+]
+STREETS = ['Hlavná', 'Nádražní', 'Mlynská', 'Kolejní', 'Školská',
+           'Masarykova', 'Štúrova', 'Palackého', 'Dunajská', 'Zahradní']
+VENUES = ['hala', 'aréna', 'klub', 'kino', 'divadlo', 'galéria', 'štadión',
+          'posluchárna', 'kaviareň', 'park', 'výstavisko', 'centrum']
+COMMENTS = ['skvelá atmosféra', 'stálo to za to', 'priemerné', 'dlhé rady',
+            'výborná organizácia', 'zlý zvuk', 'určite prídem znova',
+            'drahé vstupné', 'príjemné prostredie', 'sklamanie']
+ADMISSIONS = [('študent', 10), ('dospelý', 20), ('senior', 8), ('VIP', 80),
+              ('rodinné', 45)]
+
+# one password hash for all generated users, bcrypt is far too slow to hash
+# each of them
+GENERATED_PASSWORD = 'Tester123*'
+
+COPY_CHUNK = 50000
+
+
+def count(value):
+    # 100k, 1.5M, 2000
+    value = value.strip().lower()
+    factor = {'k': 10 ** 3, 'm': 10 ** 6}.get(value[-1:], 1)
+    if factor != 1:
+        value = value[:-1]
+    try:
+        return int(float(value) * factor)
+    except ValueError:
+        raise argparse.ArgumentTypeError('not a count: {}'.format(value))
+
+
+class Zipf:
+    # picks items, the k-th most popular one with weight 1 / k ** skew
+
+    def __init__(self, rng, items, skew=1.0):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(accumulate(
+            1 / (rank + 1) ** skew for rank in range(len(self.items))
+        ))
+
+    def pick(self):
+        index = bisect_left(self.cum_weights,
+                            self.rng.random() * self.cum_weights[-1])
+        return self.items[min(index, len(self.items) - 1)]
+
+    def sample(self, k):
+        # k distinct items, k is small compared to the population
+        picked = set()
+        for _ in range(k * 10):
+            if len(picked) == k:
+                break
+            picked.add(self.pick())
+        return picked
+
+
+def generate_users(rng, args):
+    hashes = {}
+    rows = []
+    for name, password, role in ACCOUNTS:
+        if password not in hashes:
+            hashes[password] = hasher.hash(password)
+        rows.append((len(rows) + 1, name, hashes[password], role.name))
+    generated = hasher.hash(GENERATED_PASSWORD)
+    for i in range(args.users):
+        draw = rng.random()
+        if draw < 0.01:
+            role = RoleEnum.deactivated
+        elif draw < 0.015:
+            role = RoleEnum.moderator
+        else:
+            role = RoleEnum.user
+        rows.append((len(rows) + 1, 'user{:07d}'.format(i), generated,
+                     role.name))
+    return rows
+
+
+def generate_places(rng, args):
+    rows = []
+    for place_id in range(1, args.places + 1):
+        city, postcode = rng.choice(CITIES)
+        rows.append((
+            place_id,
+            '{} {} {}'.format(city, rng.choice(VENUES), place_id),
+            '{} {}, {} {}'.format(rng.choice(STREETS), place_id, postcode,
+                                  city),
+            None,
+            rng.random() < 0.95
+        ))
+    return rows
+
+
+def generate_categories(rng, args):
+    # the fixed tree first, deeper generated subcategories after it
+    rows = []
+    for root, children in CATEGORIES.items():
+        root_id = len(rows) + 1
+        rows.append((root_id, root, None, True, None))
+        for child in children:
+            rows.append((len(rows) + 1, child, None, rng.random() < 0.9,
+                         root_id))
+    rows = rows[:args.categories]
+    while len(rows) < args.categories:
+        parent = rng.choice(rows)
+        category_id = len(rows) + 1
+        rows.append((category_id, '{} {}'.format(parent[1], category_id),
+                     None, rng.random() < 0.9, parent[0]))
+    return rows
+
+
+def event_span(rng, anchor, args):
+    day = anchor + timedelta(
+        days=rng.randint(-args.past_days, args.future_days)
     )
-
-    db.session.add(incheba)
-    db.session.add(vodaren)
-    db.session.add(hala)
-    db.session.add(vystaviste)
-    db.session.add(d105)
-    db.session.commit()
-
-    sport = Category(
-            name="šport",
-            description="športové aktivity",
-            approved=True
-            )
-
-    hokej = Category(
-                name="hokej",
-                description="hokejové zápasy",
-                parent_id=1,
-                approved=False
-                )
-    futbal = Category(
-                name="futbal",
-                description="futbalové zápasy",
-                parent_id=1,
-                approved=True
-                )
-    tenis = Category(
-                name="tenis",
-                description="tenisové zápasy",
-                parent_id=1,
-                approved=True
-                )
-    hudba = Category(
-                name="hudba",
-                description="hudobné podujatia",
-                approved=True
-                )
-    symfonia = Category(
-                name="symfónia",
-                description="symfonické koncerty",
-                parent_id=5,
-                approved=True
-                )
-    rock = Category(
-                name="rock",
-                description="rockové koncerty",
-                parent_id=5,
-                approved=True
-                )
-    education = Category(
-                name="vzdelanie",
-                description="vzdelávacie aktivity",
-                approved=True
-                )
-
-    lecture = Category(
-            name="prednáška",
-            parent_id=8,
-            approved=True
-    )
-
-    online = Category(
-                name="online",
-                description="prostredníctvom PC",
-                parent_id=9,
-                approved=True
-
-                )
-    offline = Category(
-                name="offline",
-                description="v reálnom priestore",
-                parent_id=9,
-                approved=True
-                )
-
-    db.session.add(sport)
-    db.session.add(hokej)
-    db.session.add(futbal)
-    db.session.add(tenis)
-    db.session.add(hudba)
-    db.session.add(symfonia)
-    db.session.add(rock)
-    db.session.add(education)
-    db.session.add(lecture)
-    db.session.add(online)
-    db.session.add(offline)
-    db.session.commit()
-
-    student_admission = Admission(
-            name="študent",
-            amount=10
-    )
-    adult_admission = Admission(
-                name="dospelý",
-                amount=20
+    hour = rng.choices([10, 14, 17, 18, 19, 20],
+                       weights=[1, 1, 2, 4, 5, 3])[0]
+    start = datetime(day.year, day.month, day.day, hour,
+                     rng.choice([0, 0, 15, 30, 30, 45]))
+    draw = rng.random()
+    if draw < 0.85:
+        length = timedelta(minutes=rng.randint(4, 16) * 15)
+    elif draw < 0.95:
+        length = timedelta(hours=rng.randint(6, 10))
+    else:
+        length = timedelta(days=rng.randint(1, 4), hours=rng.randint(0, 6))
+    return start, start + length
+
+
+def generate_events(rng, args, users, places, categories, anchor):
+    owners = Zipf(rng, [row[0] for row in users
+                        if row[3] != RoleEnum.deactivated.name], skew=1.1)
+    hosts = Zipf(rng, [row[0] for row in places if row[4]], skew=1.0)
+    topics = Zipf(rng, [row for row in categories if row[3]], skew=0.9)
+    parents = {row[0]: row[4] for row in categories}
+
+    events, event_categories, event_admissions = [], [], []
+    for event_id in range(1, args.events + 1):
+        start, end = event_span(rng, anchor, args)
+        if rng.random() < 0.1:
+            capacity = None
+        else:
+            capacity = max(5, min(20000, int(rng.lognormvariate(4.6, 1.0))))
+        topic = topics.pick()
+        events.append([
+            event_id,
+            '{} {}'.format(topic[1].capitalize(), event_id),
+            start,
+            end,
+            capacity,
+            'Podujatie o téme {}.'.format(topic[1]),
+            None,
+            rng.random() < 0.93,
+            0,
+            0,
+            owners.pick(),
+            hosts.pick()
+        ])
+
+        # the topic, often its parent and now and then another one
+        tags = {topic[0]}
+        if parents[topic[0]] is not None and rng.random() < 0.7:
+            tags.add(parents[topic[0]])
+        if rng.random() < 0.2:
+            tags.add(topics.pick()[0])
+        event_categories.extend((event_id, tag) for tag in sorted(tags))
+        if rng.random() < 0.2:
+            for admission_id in sorted(rng.sample(
+                    range(1, len(ADMISSIONS) + 1), rng.randint(1, 2))):
+                event_admissions.append((event_id, admission_id))
+    return events, event_categories, event_admissions
+
+
+def generate_attendance(rng, args, users, events, event_admissions, anchor):
+    # popularity is heavy tailed, an event never has more attendees than
+    # seats; paid events have some requests still waiting for approval.
+    # Attendees join in the two months before the event, or in the last two
+    # weeks for events further ahead; the join times come from their own
+    # generator so the rest of the data stays as it was
+    paid = {event_id for event_id, _ in event_admissions}
+    joined = random.Random('joined-{}'.format(args.seed))
+    today = datetime(anchor.year, anchor.month, anchor.day)
+    attendees = Zipf(rng, [row[0] for row in users
+                           if row[3] != RoleEnum.deactivated.name], skew=0.5)
+    open_events = [event for event in events if event[7]]
+    popularity = [rng.paretovariate(1.2) for _ in open_events]
+    total = sum(popularity) or 1
+
+    rows = []
+    for event, weight in zip(open_events, popularity):
+        wanted = int(round(args.attendance * weight / total))
+        if event[4] is not None:
+            wanted = min(wanted, event[4])
+        wanted = min(wanted, len(attendees.items))
+        if wanted == 0:
+            continue
+        if wanted > len(attendees.items) // 10:
+            user_ids = rng.sample(attendees.items, wanted)
+        else:
+            user_ids = attendees.sample(wanted)
+        for user_id in sorted(user_ids):
+            approved = event[0] not in paid or rng.random() < 0.7
+            created_at = event[2] - timedelta(
+                seconds=joined.uniform(0, 60 * 86400))
+            if created_at > today:
+                created_at = today - timedelta(
+                    seconds=joined.uniform(0, 14 * 86400))
+            rows.append((event[0], user_id, None, approved, created_at))
+            if approved:
+                event[8] += 1
+            else:
+                event[9] += 1
+    return rows
+
+
+def generate_reviews(rng, args, events, attendance, anchor):
+    # attendees of past events review them, each at most once; every event
+    # has a quality the ratings scatter around
+    ended = {event[0] for event in events
+             if event[3] < datetime(anchor.year, anchor.month, anchor.day)}
+    reviewers = {}
+    for event_id, user_id, _, approved, _ in attendance:
+        if approved and event_id in ended:
+            reviewers.setdefault(event_id, []).append(user_id)
+    candidates = sum(len(users) for users in reviewers.values())
+    share = min(1.0, args.reviews / candidates) if candidates else 0
+
+    rows = []
+    for event_id in sorted(reviewers):
+        users = reviewers[event_id]
+        wanted = min(len(users), int(math.floor(
+            len(users) * share + rng.random())))
+        quality = rng.gauss(7.5, 1.5)
+        for user_id in rng.sample(users, wanted):
+            rating = max(1, min(10, int(round(rng.gauss(quality, 1.5)))))
+            comment = rng.choice(COMMENTS) if rng.random() < 0.6 else None
+            rows.append((len(rows) + 1, comment, rating, user_id, event_id))
+    return rows
+
+
+def copy_rows(cursor, table, columns, rows):
+    # COPY in chunks, None is loaded as NULL
+    for offset in range(0, len(rows), COPY_CHUNK):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows[offset:offset + COPY_CHUNK])
+        buffer.seek(0)
+        cursor.copy_expert(
+            'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+                table, ', '.join(columns)),
+            buffer
         )
-    db.session.add(student_admission)
-    db.session.add(adult_admission)
-    db.session.commit()
-
-    user1 = User(
-            name="tester",
-            password=bcrypt.generate_password_hash("Tester123*").decode(
-                    'utf-8'
-                    ),
-            role=RoleEnum.user
-            )
 
-    user2 = User(
-            name="popocatepepl",
-            password=bcrypt.generate_password_hash("Tester123*").decode(
-                    'utf-8'
-                        ),
-            role=RoleEnum.user
+
+def load(tables):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # the counters are generated along with the attendance, keep the
+        # event_user trigger from adding to them
+        cursor.execute("SET LOCAL iis.attendance_trigger = 'off'")
+        for table, columns, rows in tables:
+            started = time.perf_counter()
+            copy_rows(cursor, table, columns, rows)
+            print('{:>16} {:>10} rows {:>8.1f}s'.format(
+                table, len(rows), time.perf_counter() - started))
+        for table in ['"user"', 'place', 'category', 'event', 'review',
+                      'admission']:
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence('{0}', 'id'), "
+                "coalesce(max(id), 1), max(id) IS NOT NULL) "
+                "FROM {0}".format(table)
             )
-    user3 = User(
-                name="hraskovie",
-                password=bcrypt.generate_password_hash("Tester123*").decode(
-                        'utf-8'
-                        ),
-                role=RoleEnum.user
+        connection.commit()
+        cursor.execute('ANALYZE')
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='counts take k and M suffixes, e.g. 100k or 1.5M'
     )
+    parser.add_argument('--users', type=count, default=1000)
+    parser.add_argument('--places', type=count, default=50)
+    parser.add_argument('--categories', type=count, default=40)
+    parser.add_argument('--events', type=count, default=500)
+    parser.add_argument('--attendance', type=count, default=10000,
+                        help='approximate number of attendees in total')
+    parser.add_argument('--reviews', type=count, default=2000,
+                        help='approximate number of reviews, at most one '
+                        'per attendee of a past event')
+    parser.add_argument('--seed', type=int, default=2023)
+    parser.add_argument('--anchor', type=date.fromisoformat,
+                        default=date.today(),
+                        help='events are spread around this date, today '
+                        'by default')
+    parser.add_argument('--past-days', type=int, default=365)
+    parser.add_argument('--future-days', type=int, default=180)
+    parser.add_argument('--truncate', action='store_true',
+                        help='empty all tables first')
+    return parser
+
+
+def fill(args):
+    # the whole run, args as parsed by build_parser(); returns the exit code
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    users = generate_users(rng, args)
+    places = generate_places(rng, args)
+    categories = generate_categories(rng, args)
+    events, event_categories, event_admissions = generate_events(
+        rng, args, users, places, categories, args.anchor)
+    attendance = generate_attendance(rng, args, users, events,
+                                     event_admissions, args.anchor)
+    reviews = generate_reviews(rng, args, events, attendance, args.anchor)
+    admissions = [(i + 1, name, amount)
+                  for i, (name, amount) in enumerate(ADMISSIONS)]
+    print('generated in {:.1f}s'.format(time.perf_counter() - started))
+    if len(attendance) < 0.9 * args.attendance:
+        print('only {} attendees fit into the seats of the approved '
+              'events'.format(len(attendance)))
+    if len(reviews) < 0.9 * args.reviews:
+        print('only {} attendees of past events could write a review, '
+              'raise --attendance for more'.format(len(reviews)))
+
+    with app.app_context():
+        if args.truncate:
+            db.session.execute(text(
+                'TRUNCATE user_session, review, event_user, event_category, '
+                'event_admission, event, category, place, admission, "user" '
+                'RESTART IDENTITY CASCADE'
+            ))
+            db.session.commit()
+        elif db.session.execute(text('SELECT 1 FROM "user" LIMIT 1')).first():
+            print('The database already has data, use --truncate to '
+                  'replace it')
+            return 1
+
+        load([
+            ('"user"', ['id', 'name', 'password', 'role'], users),
+            ('place', ['id', 'name', 'address', 'description', 'approved'],
+             places),
+            ('category', ['id', 'name', 'description', 'approved',
+                          'parent_id'], categories),
+            ('admission', ['id', 'name', 'amount'], admissions),
+            ('event', ['id', 'name', 'start_datetime', 'end_datetime',
+                       'capacity', 'description', 'image', 'approved',
+                       'approved_count', 'pending_count', 'owner_id',
+                       'place_id'], events),
+            ('event_category', ['event_id', 'category_id'],
+             event_categories),
+            ('event_admission', ['event_id', 'admission_id'],
+             event_admissions),
+            ('event_user', ['event_id', 'user_id', 'admission', 'approved',
+                            'created_at'], attendance),
+            ('review', ['id', 'comment', 'rating', 'user_id', 'event_id'],
+             reviews),
+        ])
+        # the rating totals follow from the reviews just loaded
+        reconcile_ratings()
+        leaderboard.refresh()
+    print('done in {:.1f}s'.format(time.perf_counter() - started))
+    return 0
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.places < 1 or args.categories < 1:
+        parser.error('at least one place and one category are needed')
+    return fill(args)
 
-    mod = User(
-            name="moderator",
-            password=bcrypt.generate_password_hash("modTester123*").decode(
-                    'utf-8'
-                    ),
-            role=RoleEnum.moderator
-            )
-    admin = User(
-            name="admin",
-            password=bcrypt.generate_password_hash("adminTester123*").decode(
-                    'utf-8'
-                    ),
-            role=RoleEnum.administrator
-            )
 
-    db.session.add(user1)
-    db.session.add(user2)
-    db.session.add(user3)
-    db.session.add(mod)
-    db.session.add(admin)
-    db.session.commit()
-
-    futbal_zapas = Event(
-            name="Real Madrid - Barcelona",
-            start_datetime="2023-11-01 20:00:00",
-            end_datetime="2023-11-01 22:00:00",
-            place=vystaviste,
-            capacity=500,
-            description="El klasico",
-            image="https://www.fczbrno.cz/img/luzanky-clanek.png",
-            owner_id=1,
-            approved=True,
-    )
-    futbal_zapas.categories.append(sport)
-    futbal_zapas.categories.append(futbal)
-
-    koncert = Event(
-                name="Hans Zimmer Bratislava",
-                start_datetime="2023-11-30 19:00:00",
-                end_datetime="2023-11-30 22:00:00",
-                place=incheba,
-                capacity=1200,
-                description="Koncert slávneho skladateľa",
-                image="""https://www.billboard.com/wp-content/uploads/2021/"""
-                """11/hans-zimmer-oscar-music-billboard-sound-bb16-1548.jpg""",
-                owner_id=2,
-                approved=True,
-        )
-    koncert2 = Event(
-                name="Hans Zimmer Brno",
-                start_datetime="2023-12-13 18:00:00",
-                end_datetime="2023-12-13 21:00:00",
-                place=vystaviste,
-                capacity=1000,
-                description="Koncert slávneho skladateľa",
-                image="""https://www.billboard.com/wp-content/uploads/2021/"""
-                """11/hans-zimmer-oscar-music-billboard-sound-bb16-1548.jpg""",
-                owner_id=2,
-                approved=True,
-        )
-    koncert3 = Event(
-                name="Iron Maiden",
-                start_datetime="2023-12-18 18:00:00",
-                end_datetime="2023-12-18 23:59:59",
-                place=vodaren,
-                capacity=1000,
-                description="Koncert slávnej skupiny",
-                image="""https://i.scdn.co/image"""
-                """/ab67616100005174232a905537f61c00da9d16e0""",
-                owner_id=1,
-                approved=False,  # append rock to categories
-        )
-    iis = Event(
-            name="IIS prednáška 1",
-            start_datetime="2023-11-30 18:00:00",
-            end_datetime="2023-11-30 20:00:00",
-            place=d105,
-            capacity=1,
-            description="IIS prednáška",
-            owner_id=3,
-            approved=True
-    )
-    koncert.categories.append(hudba)
-    koncert.categories.append(symfonia)
-    koncert2.categories.append(hudba)
-    koncert2.categories.append(symfonia)
-    koncert3.categories.append(hudba)
-    iis.categories.append(education)
-    iis.categories.append(lecture)
-    iis.categories.append(offline)
-
-    koncert2.admissions.append(student_admission)
-    koncert2.admissions.append(adult_admission)
-
-    db.session.add(futbal_zapas)
-    db.session.add(koncert)
-    db.session.add(koncert2)
-    db.session.add(koncert3)
-    db.session.add(iis)
-    db.session.commit()
-
-    user_event = UserEvent(
-        event_id=2,
-        user_id=1,
-    )
-    db.session.add(UserEvent(
-        event_id=2,
-        user_id=1,
-    ))
-    db.session.add(UserEvent(
-        event_id=2,
-        user_id=2,
-    ))
-    db.session.add(UserEvent(
-        event_id=2,
-        user_id=3,
-    ))
-    db.session.add(UserEvent(
-        event_id=2,
-        user_id=4,
-    ))
-    db.session.add(UserEvent(
-        event_id=3,
-        user_id=4,
-    ))
-    db.session.add(UserEvent(
-        event_id=3,
-        user_id=3,
-    ))
-    db.session.add(UserEvent(
-        event_id=3,
-        user_id=2,
-    ))
-    db.session.add(UserEvent(
-        event_id=3,
-        user_id=1,
-    ))
-    db.session.add(UserEvent(
-        event_id=5,
-        user_id=1,
-    ))
-    db.session.add(UserEvent(
-        event_id=1,
-        user_id=1,
-    ))
-    db.session.commit()
-
-    futbal_zapas = Review(
-            comment="hrozne dobrý zápas, bavili ma fanúšikovia",
-            rating=10,
-            user_id=1,
-            event_id=1
-    )
-    db.session.add(futbal_zapas)
-    db.session.commit()
+if __name__ == "__main__":
+    sys.exit(main())
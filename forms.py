@@ -6,7 +6,7 @@ from wtforms import (BooleanField, DateTimeField, IntegerField, SelectField,
                      TextAreaField, widgets)
 from wtforms.validators import DataRequired, Length, Optional
 
-from models import Category, Place, RoleEnum, Admission
+from models import Place, RoleEnum, Admission
 from utils import get_category_choices, validate_date
 
 
@@ -49,9 +49,8 @@ class EventForm(FlaskForm):
         self.place_id.choices = [(p.id, p.name) for p in Place.query.filter_by(
             approved=True
         )]
-        self.category_ids.choices = [
-            (c.id, c.name) for c in Category.query.all()
-            ]
+        # only approved categories, without the none choice
+        self.category_ids.choices = get_category_choices()[1:]
         self.admission_ids.choices = [
             (c.id, c.name) for c in Admission.query.all()
             ]
@@ -96,9 +95,8 @@ class EditEventForm(FlaskForm):
         self.place_id.choices = [(p.id, p.name) for p in Place.query.filter_by(
             approved=True
             ).all()]
-        self.category_ids.choices = [
-            (c.id, c.name) for c in Category.query.all()
-            ]
+        # only approved categories, without the none choice
+        self.category_ids.choices = get_category_choices()[1:]
         self.admission_ids.choices = [
             (c.id, c.name) for c in Admission.query.all()
             ]
@@ -176,6 +174,9 @@ class FilterForm(FlaskForm):
 
     approved = BooleanField('Only approved', default=False)
     has_admission = BooleanField('Has admission', default=False)
+    sort = SelectField('Sort by', choices=[('start', 'Start'),
+                                           ('rating', 'Rating')],
+                       default='start')
 
     def __init__(self, *args, **kwargs):
         super(FilterForm, self).__init__(*args, **kwargs)
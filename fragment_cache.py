@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import observe_cache
+
+
+class MemoryBackend:
+    # in-process LRU, entries also expire so that other workers' writes show
+    # up eventually
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def incr(self, key):
+        with self.lock:
+            expires, value = self.entries.get(key, (None, 0))
+            # counters must outlive the fragments they version
+            self.entries[key] = (float('inf'), value + 1)
+            self.entries.move_to_end(key)
+            return value + 1
+
+
+class RedisBackend:
+    # any Redis compatible server, shared by all workers
+
+    def __init__(self, url, ttl=300, prefix='iis:fragment:'):
+        import redis  # optional, only needed with the redis backend
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value.encode('utf-8'), ex=self.ttl)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+# Cache of rendered HTML fragments. Month grids are keyed by a per-month
+# generation which event writes bump, so invalidating a month never has to
+# enumerate its keys. Event rows are keyed by the event version and need no
+# invalidation at all.
+class FragmentCache:
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        ttl = config.get('ttl', 300)
+        if config.get('backend', 'memory') == 'redis':
+            self.backend = RedisBackend(config['redis_url'], ttl=ttl)
+        else:
+            self.backend = MemoryBackend(config.get('max_entries', 1024),
+                                         ttl=ttl)
+
+    def get_or_render(self, key, render, name):
+        if not self.enabled:
+            return render()
+        fragment = self.backend.get(key)
+        observe_cache(name, fragment is not None)
+        if fragment is None:
+            fragment = render()
+            self.backend.set(key, fragment)
+        return fragment
+
+    def month_grid(self, month, year, tier, render):
+        generation = self.backend.get(
+            'generation:{}-{}'.format(year, month)
+        ) or 0
+        return self.get_or_render(
+            'grid:{}-{}:{}:{}'.format(year, month, generation, tier), render,
+            'month_grid'
+        )
+
+    def event_rows(self, rows, render):
+        # rows are (event, variant) pairs, render is called once with the
+        # pairs that are not cached and returns their fragments in order
+        keys = [
+            'row:{}:{}:{}'.format(event.id, event.version, variant)
+            for event, variant in rows
+        ]
+        if self.enabled:
+            fragments = [self.backend.get(key) for key in keys]
+            for fragment in fragments:
+                observe_cache('event_row', fragment is not None)
+        else:
+            fragments = [None] * len(keys)
+
+        missing = [i for i, fragment in enumerate(fragments)
+                   if fragment is None]
+        if missing:
+            rendered = render([rows[i] for i in missing])
+            for i, fragment in zip(missing, rendered):
+                fragments[i] = fragment
+                if self.enabled:
+                    self.backend.set(keys[i], fragment)
+        return fragments
+
+    def invalidate_months(self, start, end):
+        # drop the grids of every month between start and end
+        if start is None or end is None:
+            return
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            self.backend.incr('generation:{}-{}'.format(year, month))
+            month += 1
+            if month > 12:
+                year, month = year + 1, 1
@@ -0,0 +1,29 @@
+# gunicorn -c gunicorn.conf.py app:app
+#
+# The workers share their Prometheus samples through files in
+# PROMETHEUS_MULTIPROC_DIR, which has to be exported, and emptied, before
+# gunicorn starts:
+#
+#   rm -rf /tmp/iis-metrics && mkdir /tmp/iis-metrics
+#   PROMETHEUS_MULTIPROC_DIR=/tmp/iis-metrics gunicorn -c gunicorn.conf.py \
+#       app:app
+import multiprocessing
+import os
+
+bind = '127.0.0.1:8000'
+workers = multiprocessing.cpu_count() * 2 + 1
+
+
+def child_exit(server, worker):
+    # the gauges of a dead worker must not count any more
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # connect before the first request rather than during it
+    from app import engine_tuning
+
+    engine_tuning.warm_up()
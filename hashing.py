@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ServiceUnavailable
+
+from metrics import observe_hashing, observe_hashing_refused
+
+
+class HashingBusy(ServiceUnavailable):
+    # answered with 503 and Retry-After by Flask itself
+    description = 'Too many logins at once, please try again in a moment.'
+
+
+def timed(operation, function, *args):
+    started = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        observe_hashing(operation, time.perf_counter() - started)
+
+
+# Runs bcrypt off the request thread on a bounded pool. bcrypt releases the
+# GIL, so the pool uses the cores while request threads wait. At most
+# max_pending hashes are queued or running, requests beyond that fail fast
+# with HashingBusy instead of piling up behind a login storm.
+class PasswordHasher:
+
+    def __init__(self, bcrypt, config=None):
+        config = config or {}
+        self.bcrypt = bcrypt
+        self.rounds = config.get('rounds', 12)
+        workers = config.get('workers') or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(max_workers=workers,
+                                       thread_name_prefix='hashing')
+        self.slots = threading.BoundedSemaphore(
+            config.get('max_pending', 4 * workers)
+        )
+
+    def run(self, operation, function, *args):
+        if not self.slots.acquire(blocking=False):
+            observe_hashing_refused()
+            raise HashingBusy(retry_after=1)
+        try:
+            future = self.pool.submit(timed, operation, function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda future: self.slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self.run(
+            'hash', self.bcrypt.generate_password_hash, password, self.rounds
+        ).decode('utf-8')
+
+    def check(self, password_hash, password):
+        return self.run('check', self.bcrypt.check_password_hash,
+                        password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # bcrypt hashes look like $2b$<cost>$<salt and hash>
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
@@ -0,0 +1,57 @@
+from flask_login import UserMixin
+
+from fragment_cache import MemoryBackend
+from metrics import observe_cache
+from models import RoleEnum, User, db
+
+# flask session key, User.identity_version at login
+IDENTITY_VERSION = '_identity_version'
+
+
+class UserSnapshot(UserMixin):
+    # what requests read of the logged in user, detached from the database
+    # session so it can be shared between requests
+
+    def __init__(self, id, name, role):
+        self.id = id
+        self.name = name
+        self.role = role
+
+
+# Per process cache of user snapshots, so that authenticated requests cost no
+# identity query on a warm worker. Snapshots are kept per user and identity
+# version, the version the session logged in with. A role change bumps the
+# version and taking privileges away revokes the user's sessions, so their
+# next login misses the old snapshot in every worker. Sessions that survive
+# a promotion see it on this worker at once and on the others within the TTL.
+class IdentityCache:
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.backend = MemoryBackend(config.get('max_entries', 4096),
+                                     ttl=config.get('ttl', 60))
+
+    def load(self, user_id, version=None):
+        key = (int(user_id), version)
+        snapshot = None
+        if self.enabled:
+            snapshot = self.backend.get(key)
+            observe_cache('identity', snapshot is not None)
+        if snapshot is None:
+            row = db.session.execute(
+                db.select(User.id, User.name, User.role)
+                .where(User.id == key[0])
+            ).first()
+            if row is None:
+                return None
+            snapshot = UserSnapshot(row.id, row.name, row.role)
+            if self.enabled:
+                self.backend.set(key, snapshot)
+        # deactivated accounts are logged out on their next request
+        if snapshot.role == RoleEnum.deactivated:
+            return None
+        return snapshot
+
+    def invalidate(self, user_id, version=None):
+        self.backend.delete((int(user_id), version))
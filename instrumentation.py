@@ -0,0 +1,98 @@
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# expanded IN lists differ in length only, count them as one statement shape
+IN_LIST = re.compile(r'\((?:%\(\w+\)s, )+%\(\w+\)s\)')
+
+
+def statement_shape(statement):
+    return IN_LIST.sub('(...)', ' '.join(statement.split()))
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+
+
+def request_stats():
+    # statistics of the current request, None outside of requests
+    if not has_request_context():
+        return None
+    if 'request_stats' not in g:
+        g.request_stats = RequestStats()
+    return g.request_stats
+
+
+# Counts the SQL statements and the database time of every request through
+# engine events, so every engine and session is covered. The numbers go to
+# the X-Query-Count and Server-Timing headers, slow statements and
+# statements repeated within one request (N+1 loading) are logged with the
+# route that issued them.
+class SQLInstrumentation:
+
+    def __init__(self, app, config=None):
+        config = config or {}
+        self.app = app
+        self.enabled = config.get('enabled', True)
+        self.headers = config.get('headers', True)
+        self.slow_query_ms = config.get('slow_query_ms', 100)
+        self.repeat_threshold = config.get('n_plus_one_threshold', 10)
+        if not self.enabled:
+            return
+        event.listen(Engine, 'before_cursor_execute', self.before_execute)
+        event.listen(Engine, 'after_cursor_execute', self.after_execute)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def before_execute(self, conn, cursor, statement, parameters, context,
+                       executemany):
+        # kept on the statement's own context, a statement that fails never
+        # reaches after_execute and leaves nothing behind
+        context.query_started = time.perf_counter()
+
+    def after_execute(self, conn, cursor, statement, parameters, context,
+                      executemany):
+        elapsed = time.perf_counter() - context.query_started
+        stats = request_stats()
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.db_time += elapsed
+        stats.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= self.slow_query_ms:
+            self.app.logger.warning(
+                'slow query %.1fms in %s %s: %s', elapsed * 1000,
+                request.method, request.endpoint, statement_shape(statement)
+            )
+
+    def before_request(self):
+        # the session store may have counted a query already
+        request_stats()
+
+    def after_request(self, response):
+        stats = request_stats()
+        for shape, repeated in stats.shapes.items():
+            if repeated > self.repeat_threshold:
+                self.app.logger.warning(
+                    'possible N+1 in %s %s, %d times: %s', request.method,
+                    request.endpoint, repeated, shape
+                )
+        if self.headers:
+            response.headers['X-Query-Count'] = str(stats.queries)
+            response.headers.add(
+                'Server-Timing',
+                'db;dur={:.1f};desc="{} queries"'.format(
+                    stats.db_time * 1000, stats.queries)
+            )
+            response.headers.add('Server-Timing', 'app;dur={:.1f}'.format(
+                (time.perf_counter() - stats.started) * 1000))
+        return response
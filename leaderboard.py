@@ -0,0 +1,122 @@
+import threading
+from collections import namedtuple
+
+from sqlalchemy import (Column, Float, Integer, MetaData, Table, event, func,
+                        or_)
+
+from fragment_cache import MemoryBackend
+from metrics import observe_cache
+from models import Event, Review, UserEvent
+
+# the materialized view of migration 0010, outside of db.metadata so that
+# migrations don't take it for a missing table
+leaderboard_table = Table(
+    'event_leaderboard', MetaData(),
+    Column('event_id', Integer, primary_key=True),
+    Column('recent_attendees', Integer),
+    Column('trending_rank', Integer),
+    Column('rating', Float),
+    Column('rating_rank', Integer),
+)
+
+# the view ranks 20 events of each list
+MAX_SIZE = 20
+
+Entry = namedtuple('Entry', ['event_id', 'name', 'value'])
+
+# key of the advisory lock that lets one process refresh at a time
+REFRESH_LOCK = 725001
+
+
+# "Popular this week" and "Top rated" lists of the overview page, read from
+# the event_leaderboard materialized view. Attendance and review commits
+# mark the view stale and it is refreshed concurrently, so readers never
+# wait, debounce seconds later; a burst of writes costs one refresh.
+# flask refresh-leaderboard refreshes it from cron, which also moves the
+# 7 day window of the trending list when nobody writes.
+class Leaderboard:
+
+    def __init__(self, app, db, config=None):
+        config = config or {}
+        self.app = app
+        self.db = db
+        self.enabled = config.get('enabled', True)
+        self.size = min(config.get('size', 5), MAX_SIZE)
+        self.debounce = config.get('debounce', 60)
+        self.cache = MemoryBackend(max_entries=1, ttl=config.get('ttl', 30))
+        self.lock = threading.Lock()
+        self.pending = False
+        if not self.enabled:
+            return
+        event.listen(db.session, 'after_flush', self.after_flush)
+        event.listen(db.session, 'after_commit', self.after_commit)
+
+    def after_flush(self, session, flush_context):
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(instance, (UserEvent, Review)):
+                session.info['leaderboard_stale'] = True
+                return
+
+    def after_commit(self, session):
+        if session.info.pop('leaderboard_stale', False):
+            self.changed()
+
+    def changed(self):
+        # schedules one refresh for all changes of the next debounce seconds
+        with self.lock:
+            if self.pending:
+                return
+            self.pending = True
+        timer = threading.Timer(self.debounce, self.refresh_pending)
+        timer.daemon = True
+        timer.start()
+
+    def refresh_pending(self):
+        with self.lock:
+            self.pending = False
+        with self.app.app_context():
+            self.refresh()
+
+    def refresh(self):
+        # False when another process is refreshing the view right now
+        with self.db.engine.begin() as connection:
+            if not connection.execute(
+                    self.db.select(
+                        func.pg_try_advisory_xact_lock(REFRESH_LOCK))
+            ).scalar():
+                return False
+            connection.exec_driver_sql(
+                'REFRESH MATERIALIZED VIEW CONCURRENTLY event_leaderboard')
+        return True
+
+    def lists(self):
+        # (trending, top rated) lists of Entry, best first; value is the
+        # number of recent attendees or the rating
+        if not self.enabled:
+            return [], []
+        cached = self.cache.get('lists')
+        observe_cache('leaderboard', cached is not None)
+        if cached is not None:
+            return cached
+
+        board = leaderboard_table.c
+        rows = self.db.session.execute(
+            self.db.select(Event.id, Event.name, board.recent_attendees,
+                           board.trending_rank, board.rating,
+                           board.rating_rank)
+            .join(leaderboard_table, board.event_id == Event.id)
+            .filter(or_(board.trending_rank <= self.size,
+                        board.rating_rank <= self.size))
+        ).all()
+
+        def ranked(rank, value):
+            listed = [row for row in rows if getattr(row, rank) is not None
+                      and getattr(row, rank) <= self.size]
+            listed.sort(key=lambda row: getattr(row, rank))
+            return [Entry(row.id, row.name, getattr(row, value))
+                    for row in listed]
+
+        lists = (ranked('trending_rank', 'recent_attendees'),
+                 ranked('rating_rank', 'rating'))
+        self.cache.set('lists', lists)
+        return lists
@@ -0,0 +1,126 @@
+import os
+import time
+
+from flask import Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+
+# With PROMETHEUS_MULTIPROC_DIR set, before prometheus_client is imported,
+# every worker process writes its samples to files in that directory and
+# /metrics adds up the samples of all of them.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+REQUEST_LATENCY = Histogram(
+    'iis_request_duration_seconds',
+    'Time to answer a request',
+    ['endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+RESPONSES = Counter(
+    'iis_responses_total',
+    'Responses by endpoint and status',
+    ['endpoint', 'status']
+)
+POOL_CHECKED_OUT = Gauge(
+    'iis_db_pool_checked_out',
+    'Database connections in use',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+POOL_OVERFLOW = Gauge(
+    'iis_db_pool_overflow',
+    'Database connections opened beyond the pool size',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+POOL_SIZE = Gauge(
+    'iis_db_pool_size',
+    'Configured database pool size',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+PASSWORD_HASHING = Histogram(
+    'iis_password_hashing_seconds',
+    'Time bcrypt takes to hash or check a password',
+    ['operation'],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5)
+)
+PASSWORD_HASHING_REFUSED = Counter(
+    'iis_password_hashing_refused_total',
+    'Logins and registrations refused because the hashing pool was full'
+)
+CACHE_LOOKUPS = Counter(
+    'iis_cache_lookups_total',
+    'Cache lookups by cache and result, hits / all is the hit ratio',
+    ['cache', 'result']
+)
+
+
+def observe_cache(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def observe_hashing(operation, seconds):
+    PASSWORD_HASHING.labels(operation).observe(seconds)
+
+
+def observe_hashing_refused():
+    PASSWORD_HASHING_REFUSED.inc()
+
+
+# Request latency and status counts per endpoint, database pool gauges and
+# the /metrics endpoint. The caches and the password hasher report through
+# the observe_* functions above.
+class Metrics:
+
+    def __init__(self, app, config=None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.allow = set(config.get('allow', ['127.0.0.1', '::1']))
+        if not self.enabled:
+            return
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.add_url_rule('/metrics', 'metrics', self.serve)
+
+    def watch_pool(self, engine, name):
+        # pool gauges follow every checkout and checkin of the engine
+        def update(returning=0):
+            pool = engine.pool
+            # pools without a fixed size, e.g. NullPool, report no gauges
+            if not hasattr(pool, 'checkedout'):
+                return
+            POOL_CHECKED_OUT.labels(name).set(pool.checkedout() - returning)
+            POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+            POOL_SIZE.labels(name).set(pool.size())
+
+        if not self.enabled:
+            return
+        event.listen(engine, 'connect', lambda *args: update())
+        event.listen(engine, 'checkout', lambda *args: update())
+        # fired before the connection is back in the pool
+        event.listen(engine, 'checkin', lambda *args: update(returning=1))
+
+    def before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def after_request(self, response):
+        endpoint = request.endpoint or 'unmatched'
+        if endpoint == 'metrics' or 'metrics_started' not in g:
+            return response
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(
+            time.perf_counter() - g.metrics_started)
+        RESPONSES.labels(endpoint, str(response.status_code)).inc()
+        return response
+
+    def serve(self):
+        if request.remote_addr not in self.allow:
+            abort(404)
+        registry = REGISTRY
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry),
+                        content_type=CONTENT_TYPE_LATEST)
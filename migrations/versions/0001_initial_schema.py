@@ -0,0 +1,125 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 16:14:14.445112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'admission',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('amount', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'category',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        sa.Column('parent_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['parent_id'], ['category.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'place',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('address', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('address')
+    )
+    op.create_table(
+        'user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('role', sa.Enum('deactivated', 'user', 'moderator',
+                                  'administrator', name='roleenum'),
+                  nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('start_datetime', sa.DateTime(), nullable=True),
+        sa.Column('end_datetime', sa.DateTime(), nullable=True),
+        sa.Column('capacity', sa.Integer(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('image', sa.String(), nullable=True),
+        sa.Column('approved', sa.Boolean(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['place_id'], ['place.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.create_table(
+        'event_admission',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('admission_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['admission_id'], ['admission.id']),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id']),
+        sa.PrimaryKeyConstraint('event_id', 'admission_id')
+    )
+    op.create_table(
+        'event_category',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['category.id']),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id']),
+        sa.PrimaryKeyConstraint('event_id', 'category_id')
+    )
+    op.create_table(
+        'event_user',
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('admission', sa.Integer(), nullable=True),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('event_id', 'user_id')
+    )
+    op.create_table(
+        'review',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.String(), nullable=True),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['event_id'], ['event.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('review')
+    op.drop_table('event_user')
+    op.drop_table('event_category')
+    op.drop_table('event_admission')
+    op.drop_table('event')
+    op.drop_table('user')
+    op.drop_table('place')
+    op.drop_table('category')
+    op.drop_table('admission')
+    sa.Enum(name='roleenum').drop(op.get_bind(), checkfirst=True)
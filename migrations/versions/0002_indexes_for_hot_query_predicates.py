@@ -0,0 +1,61 @@
+"""indexes for hot query predicates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 16:14:39.436426
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+UNAPPROVED = sa.text('approved = false')
+
+
+def upgrade():
+    # month windows and listings ordered by start
+    op.create_index('ix_event_start_end', 'event',
+                    ['start_datetime', 'end_datetime'])
+    op.create_index('ix_event_end_datetime', 'event', ['end_datetime'])
+    op.create_index('ix_event_owner_id', 'event', ['owner_id'])
+    op.create_index('ix_event_place_id', 'event', ['place_id'])
+    op.create_index('ix_event_category_category_id', 'event_category',
+                    ['category_id'])
+    op.create_index('ix_event_user_user_id', 'event_user', ['user_id'])
+    op.create_index('ix_review_event_id', 'review', ['event_id'])
+    op.create_index('ix_review_user_id', 'review', ['user_id'])
+    op.create_index('ix_category_parent_id', 'category', ['parent_id'])
+
+    # moderation queues and pending attendance requests
+    op.create_index('ix_event_unapproved', 'event', ['start_datetime'],
+                    postgresql_where=UNAPPROVED)
+    op.create_index('ix_event_user_pending', 'event_user', ['event_id'],
+                    postgresql_where=UNAPPROVED)
+    op.create_index('ix_place_unapproved', 'place', ['id'],
+                    postgresql_where=UNAPPROVED)
+    op.create_index('ix_category_unapproved', 'category', ['id'],
+                    postgresql_where=UNAPPROVED)
+
+
+def downgrade():
+    op.drop_index('ix_category_unapproved', table_name='category')
+    op.drop_index('ix_place_unapproved', table_name='place')
+    op.drop_index('ix_event_user_pending', table_name='event_user')
+    op.drop_index('ix_event_unapproved', table_name='event')
+
+    op.drop_index('ix_category_parent_id', table_name='category')
+    op.drop_index('ix_review_user_id', table_name='review')
+    op.drop_index('ix_review_event_id', table_name='review')
+    op.drop_index('ix_event_user_user_id', table_name='event_user')
+    op.drop_index('ix_event_category_category_id',
+                  table_name='event_category')
+    op.drop_index('ix_event_place_id', table_name='event')
+    op.drop_index('ix_event_owner_id', table_name='event')
+    op.drop_index('ix_event_end_datetime', table_name='event')
+    op.drop_index('ix_event_start_end', table_name='event')
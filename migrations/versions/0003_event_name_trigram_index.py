@@ -0,0 +1,36 @@
+"""trigram index for the event name search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:31:02.118334
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    available = bind.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).first()
+    if available is None:
+        # search.py falls back to plain ILIKE without the extension
+        print('pg_trgm is not available, skipping the trigram index')
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_event_name_trgm', 'event', ['name'],
+                    postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_event_name_trgm')
@@ -0,0 +1,26 @@
+"""event modification stamp
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:52:40.602941
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('updated_at', sa.DateTime(),
+                                     server_default=sa.text('now()'),
+                                     nullable=False))
+
+
+def downgrade():
+    op.drop_column('event', 'updated_at')
@@ -0,0 +1,79 @@
+"""attendee counters on event
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:26:51.730218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('approved_count', sa.Integer(),
+                                     server_default='0', nullable=False))
+    op.add_column('event', sa.Column('pending_count', sa.Integer(),
+                                     server_default='0', nullable=False))
+    op.execute('''
+        UPDATE event SET
+            approved_count = counts.approved,
+            pending_count = counts.pending
+        FROM (
+            SELECT event_id,
+                   count(*) FILTER (WHERE approved) AS approved,
+                   count(*) FILTER (WHERE NOT approved) AS pending
+            FROM event_user
+            GROUP BY event_id
+        ) AS counts
+        WHERE event.id = counts.event_id
+    ''')
+
+    # keeps the counters right for writes that bypass attendance.py, which
+    # turns it off for its own transactions
+    op.execute('''
+        CREATE FUNCTION event_attendance_counts() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF current_setting('iis.attendance_trigger', true) = 'off' THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE event SET
+                    approved_count = approved_count
+                        - CASE WHEN OLD.approved THEN 1 ELSE 0 END,
+                    pending_count = pending_count
+                        - CASE WHEN OLD.approved THEN 0 ELSE 1 END
+                WHERE id = OLD.event_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE event SET
+                    approved_count = approved_count
+                        + CASE WHEN NEW.approved THEN 1 ELSE 0 END,
+                    pending_count = pending_count
+                        + CASE WHEN NEW.approved THEN 0 ELSE 1 END
+                WHERE id = NEW.event_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    ''')
+    op.execute('''
+        CREATE TRIGGER event_user_attendance_counts
+        AFTER INSERT OR DELETE OR UPDATE OF approved, event_id
+        ON event_user
+        FOR EACH ROW EXECUTE FUNCTION event_attendance_counts()
+    ''')
+
+
+def downgrade():
+    op.execute('DROP TRIGGER event_user_attendance_counts ON event_user')
+    op.execute('DROP FUNCTION event_attendance_counts()')
+    op.drop_column('event', 'pending_count')
+    op.drop_column('event', 'approved_count')
@@ -0,0 +1,40 @@
+"""server side sessions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:40:12.318504
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_session',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_session_user_id'), 'user_session',
+                    ['user_id'], unique=False)
+    op.create_index(op.f('ix_user_session_expires_at'), 'user_session',
+                    ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_user_session_expires_at'),
+                  table_name='user_session')
+    op.drop_index(op.f('ix_user_session_user_id'), table_name='user_session')
+    op.drop_table('user_session')
@@ -0,0 +1,27 @@
+"""review pages of an event
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 19:05:41.207113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # seeks to a page of an event's reviews in id order, covers the lookups
+    # by event_id on its own as well
+    op.create_index('ix_review_event_id_id', 'review', ['event_id', 'id'])
+    op.drop_index('ix_review_event_id', table_name='review')
+
+
+def downgrade():
+    op.create_index('ix_review_event_id', 'review', ['event_id'])
+    op.drop_index('ix_review_event_id_id', table_name='review')
@@ -0,0 +1,72 @@
+"""rating totals on event, place and category
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 19:48:02.513870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+TABLES = ['event', 'place', 'category']
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column('rating_sum', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('rating_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+    op.execute('''
+        UPDATE event SET
+            rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count
+        FROM (
+            SELECT event_id, sum(rating) AS rating_sum,
+                   count(*) AS rating_count
+            FROM review
+            GROUP BY event_id
+        ) AS totals
+        WHERE event.id = totals.event_id
+    ''')
+    op.execute('''
+        UPDATE place SET
+            rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count
+        FROM (
+            SELECT place_id, sum(rating_sum) AS rating_sum,
+                   sum(rating_count) AS rating_count
+            FROM event
+            WHERE rating_count > 0
+            GROUP BY place_id
+        ) AS totals
+        WHERE place.id = totals.place_id
+    ''')
+    op.execute('''
+        UPDATE category SET
+            rating_sum = totals.rating_sum,
+            rating_count = totals.rating_count
+        FROM (
+            SELECT event_category.category_id,
+                   sum(event.rating_sum) AS rating_sum,
+                   sum(event.rating_count) AS rating_count
+            FROM event_category
+            JOIN event ON event.id = event_category.event_id
+            WHERE event.rating_count > 0
+            GROUP BY event_category.category_id
+        ) AS totals
+        WHERE category.id = totals.category_id
+    ''')
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_column(table, 'rating_count')
+        op.drop_column(table, 'rating_sum')
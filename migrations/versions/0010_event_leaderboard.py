@@ -0,0 +1,83 @@
+"""event leaderboard
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 20:31:17.640215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # when attendees joined; unknown for the existing rows, which therefore
+    # never count as recent
+    op.add_column('event_user', sa.Column('created_at', sa.DateTime(),
+                                          nullable=True))
+    op.alter_column('event_user', 'created_at',
+                    server_default=sa.text('now()'))
+    op.create_index('ix_event_user_created_at', 'event_user', ['created_at'])
+
+    # the 20 events with the most attendees who joined in the last 7 days,
+    # among those not over yet, and the 20 best rated events; ratings are
+    # Bayesian averages pulling events with few reviews towards the mean
+    # rating of all events, as if they had 10 more reviews of that rating
+    op.execute('''
+        CREATE MATERIALIZED VIEW event_leaderboard AS
+        WITH prior AS (
+            SELECT coalesce(
+                sum(rating_sum)::float / nullif(sum(rating_count), 0), 0
+            ) AS mean
+            FROM event
+        ), recent AS (
+            SELECT event_id, count(*) AS attendees
+            FROM event_user
+            WHERE approved AND created_at >= now() - interval '7 days'
+            GROUP BY event_id
+        ), trending AS (
+            SELECT event.id AS event_id, recent.attendees,
+                   row_number() OVER (
+                       ORDER BY recent.attendees DESC, event.start_datetime,
+                                event.id
+                   ) AS rank
+            FROM recent
+            JOIN event ON event.id = recent.event_id
+            WHERE event.approved AND event.end_datetime >= now()
+        ), rated AS (
+            SELECT event.id AS event_id, bayesian.rating,
+                   row_number() OVER (
+                       ORDER BY bayesian.rating DESC, event.id
+                   ) AS rank
+            FROM event
+            CROSS JOIN prior
+            CROSS JOIN LATERAL (
+                SELECT (10 * prior.mean + event.rating_sum)
+                       / (10 + event.rating_count) AS rating
+            ) AS bayesian
+            WHERE event.approved AND event.rating_count > 0
+        )
+        SELECT coalesce(trending.event_id, rated.event_id) AS event_id,
+               coalesce(trending.attendees, 0) AS recent_attendees,
+               trending.rank AS trending_rank,
+               rated.rating AS rating,
+               rated.rank AS rating_rank
+        FROM (SELECT * FROM trending WHERE rank <= 20) AS trending
+        FULL JOIN (SELECT * FROM rated WHERE rank <= 20) AS rated
+            ON rated.event_id = trending.event_id
+    ''')
+    # REFRESH ... CONCURRENTLY needs a unique index
+    op.create_index('ix_event_leaderboard_event_id', 'event_leaderboard',
+                    ['event_id'], unique=True)
+
+
+def downgrade():
+    op.execute('DROP MATERIALIZED VIEW event_leaderboard')
+    op.drop_index('ix_event_user_created_at', table_name='event_user')
+    op.drop_column('event_user', 'created_at')
@@ -0,0 +1,28 @@
+"""next events of a place
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 23:40:12.508341
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # seeks to the next events of a place in start order, covers the
+    # lookups by place_id on its own as well
+    op.create_index('ix_event_place_start', 'event',
+                    ['place_id', 'start_datetime'])
+    op.drop_index('ix_event_place_id', table_name='event')
+
+
+def downgrade():
+    op.create_index('ix_event_place_id', 'event', ['place_id'])
+    op.drop_index('ix_event_place_start', table_name='event')
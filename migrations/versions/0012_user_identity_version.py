@@ -0,0 +1,25 @@
+"""user identity version
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 10:12:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('identity_version', sa.Integer(),
+                                    server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('user', 'identity_version')
@@ -0,0 +1,35 @@
+"""drop unused unapproved indexes
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 11:03:52.760114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+UNAPPROVED = sa.text('approved = false')
+
+
+def upgrade():
+    # no query looks for unapproved events, places or categories, the
+    # pending requests index of event_user stays
+    op.drop_index('ix_category_unapproved', table_name='category')
+    op.drop_index('ix_place_unapproved', table_name='place')
+    op.drop_index('ix_event_unapproved', table_name='event')
+
+
+def downgrade():
+    op.create_index('ix_event_unapproved', 'event', ['start_datetime'],
+                    postgresql_where=UNAPPROVED)
+    op.create_index('ix_place_unapproved', 'place', ['id'],
+                    postgresql_where=UNAPPROVED)
+    op.create_index('ix_category_unapproved', 'category', ['id'],
+                    postgresql_where=UNAPPROVED)
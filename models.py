@@ -6,11 +6,15 @@ from typing import List
 
 from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import (Boolean, Column, DateTime, Enum, ForeignKey, Integer,
-                        String)
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (Boolean, Column, DateTime, Enum, Float, ForeignKey,
+                        Index, Integer, String, Text, and_, cast, false,
+                        func, or_, true)
+from sqlalchemy.orm import (Mapped, joinedload, mapped_column, relationship,
+                            selectinload)
 
-db = SQLAlchemy()
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 event_category_table = db.Table(
     'event_category',
@@ -18,7 +22,10 @@ event_category_table = db.Table(
            primary_key=True),
 
     Column('category_id', Integer, ForeignKey('category.id'),
-           primary_key=True)
+           primary_key=True),
+
+    # the primary key only serves lookups by event
+    Index('ix_event_category_category_id', 'category_id')
 )
 
 event_admission_table = db.Table(
@@ -31,8 +38,46 @@ event_admission_table = db.Table(
 )
 
 
+class RatingTotals:
+    # sum and number of the review ratings of an event, or of all events of
+    # a place or a category, kept by ratings.py
+    rating_sum: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=0,
+            server_default='0'
+            )
+    rating_count: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=0,
+            server_default='0'
+            )
+
+    @property
+    def rating_average(self):
+        # None until the first review
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @classmethod
+    def rating_order(cls):
+        # pagination key, best rated first and unrated last
+        return (-func.coalesce(
+            cast(cls.rating_sum, Float) /
+            func.nullif(cast(cls.rating_count, Float), 0),
+            0
+        )).label('rating_order')
+
+
 class UserEvent(db.Model):
     __tablename__ = "event_user"
+    __table_args__ = (
+        # requests waiting for the event owner's approval
+        Index('ix_event_user_pending', 'event_id',
+              postgresql_where=Column('approved') == false()),
+    )
 
     event_id: Mapped[int] = mapped_column(
             ForeignKey("event.id"),
@@ -40,7 +85,8 @@ class UserEvent(db.Model):
             )
     user_id: Mapped[int] = mapped_column(
             ForeignKey("user.id"),
-            primary_key=True
+            primary_key=True,
+            index=True
             )
 
     user: Mapped["User"] = relationship(
@@ -58,6 +104,14 @@ class UserEvent(db.Model):
             Boolean,
             default=True
             )
+    # when the user joined, NULL for attendance older than the column
+    created_at: Mapped[datetime] = mapped_column(
+            DateTime,
+            nullable=True,
+            index=True,
+            default=datetime.now,
+            server_default=func.now()
+            )
 
     def get_item(user_id, event_id):
         query = db.select(UserEvent).filter_by(
@@ -100,6 +154,14 @@ class User(UserMixin, db.Model):
             Enum(RoleEnum),
             nullable=False
             )
+    # bumped by every role change, sessions keep the version they logged in
+    # with and identity.py caches snapshots per version
+    identity_version: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=1,
+            server_default='1'
+            )
 
     events: Mapped[List["Event"]] = relationship(
             secondary="event_user",
@@ -128,9 +190,8 @@ class User(UserMixin, db.Model):
         db.session.commit()
 
 
-class Place(db.Model):
+class Place(RatingTotals, db.Model):
     __tablename__ = "place"
-
     id: Mapped[int] = mapped_column(
             Integer,
             primary_key=True
@@ -167,8 +228,18 @@ class Place(db.Model):
         db.session.commit()
 
 
-class Event(db.Model):
+class Event(RatingTotals, db.Model):
     __tablename__ = "event"
+    __table_args__ = (
+        # month windows and listings ordered by start
+        Index('ix_event_start_end', 'start_datetime', 'end_datetime'),
+        Index('ix_event_end_datetime', 'end_datetime'),
+        # next events of a place
+        Index('ix_event_place_start', 'place_id', 'start_datetime'),
+        # name search, needs pg_trgm (see search.py)
+        Index('ix_event_name_trgm', 'name', postgresql_using='gin',
+              postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
     id: Mapped[int] = mapped_column(
             Integer,
@@ -203,12 +274,41 @@ class Event(db.Model):
             default=False,
             nullable=True
             )
+    # attendees, kept by attendance.py and by the event_user trigger
+    approved_count: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=0,
+            server_default='0'
+            )
+    pending_count: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=0,
+            server_default='0'
+            )
+    # bumped by every change shown on the event page, see Event.touch
+    version: Mapped[int] = mapped_column(
+            Integer,
+            nullable=False,
+            default=1,
+            server_default='1'
+            )
+    # last change of the event row, clients revalidate against it
+    updated_at: Mapped[datetime] = mapped_column(
+            DateTime,
+            nullable=False,
+            default=datetime.now,
+            onupdate=datetime.now,
+            server_default=func.now()
+            )
 
     owner: Mapped["User"] = relationship(
             back_populates="owned_events"
             )
     owner_id: Mapped[int] = mapped_column(
-            ForeignKey("user.id")
+            ForeignKey("user.id"),
+            index=True
             )
 
     place: Mapped["Place"] = relationship(
@@ -244,6 +344,17 @@ class Event(db.Model):
     def get_detail(id: int):
         return db.session.execute(db.select(Event).filter_by(id=id)).one()
 
+    def touch(id: int):
+        # attendance, reviews, approvals and edits change the event page
+        # without necessarily updating the event row, call this in the same
+        # transaction so cached copies of the page get revalidated
+        db.session.execute(
+            db.update(Event).where(Event.id == id).values(
+                version=Event.version + 1,
+                updated_at=datetime.now()
+            )
+        )
+
     def get_list():
         return db.session.execute(db.select(Event.name)).all()
 
@@ -252,9 +363,8 @@ class Event(db.Model):
         db.session.commit()
 
 
-class Category(db.Model):
+class Category(RatingTotals, db.Model):
     __tablename__ = "category"
-
     id: Mapped[int] = mapped_column(
             Integer,
             primary_key=True
@@ -274,7 +384,8 @@ class Category(db.Model):
 
     parent_id = mapped_column(
             Integer,
-            ForeignKey("category.id")
+            ForeignKey("category.id"),
+            index=True
             )
     parent: Mapped[List["Category"]] = relationship(
             "Category",
@@ -300,6 +411,10 @@ class Category(db.Model):
 
 class Review(db.Model):
     __tablename__ = "review"
+    __table_args__ = (
+        # reviews of an event page by page, see event_detail.py
+        Index('ix_review_event_id_id', 'event_id', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(
             Integer,
@@ -315,7 +430,8 @@ class Review(db.Model):
             )
 
     user_id: Mapped[int] = mapped_column(
-            ForeignKey("user.id")
+            ForeignKey("user.id"),
+            index=True
             )
     user: Mapped["User"] = relationship(
             back_populates="reviews"
@@ -365,5 +481,82 @@ class Admission(db.Model):
         db.session.commit()
 
 
+class UserSession(db.Model):
+    # server side session data, see sessions.py
+    __tablename__ = "user_session"
+
+    id: Mapped[str] = mapped_column(
+            String,
+            primary_key=True
+            )
+    data: Mapped[str] = mapped_column(
+            Text,
+            nullable=False
+            )
+    # logged in user, lets all sessions of a user be revoked at once
+    user_id: Mapped[int] = mapped_column(
+            ForeignKey("user.id", ondelete="CASCADE"),
+            nullable=True,
+            index=True
+            )
+    expires_at: Mapped[datetime] = mapped_column(
+            DateTime,
+            nullable=False,
+            index=True
+            )
+
+
+# loader options batch loading the relationships that the listings render,
+# so a page costs a fixed number of queries regardless of its row count
+def event_list_options():
+    return (
+        joinedload(Event.owner),
+        joinedload(Event.place),
+        selectinload(Event.categories).joinedload(Category.parent),
+    )
+
+
+def category_list_options():
+    return (
+        joinedload(Category.parent),
+        selectinload(Category.children),
+    )
+
+
+# events listed under each place or category
+UPCOMING_PER_PARENT = 5
+
+
+def upcoming_events(model, ids, viewer, now, limit=UPCOMING_PER_PARENT):
+    # {id: [Event]} of the next events of each place or category, approved
+    # ones and the viewer's own. One query seeking at most limit events per
+    # parent, its cost doesn't grow with the events of the past
+    parent = db.select(model.id).where(model.id.in_(ids)).subquery()
+    shown = Event.approved.is_(True)
+    if viewer.is_authenticated:
+        shown = or_(shown, and_(Event.approved.is_(False),
+                                Event.owner_id == viewer.id))
+    upcoming = db.select(Event.id).where(Event.start_datetime >= now, shown)
+    if model is Place:
+        upcoming = upcoming.where(Event.place_id == parent.c.id)
+    else:
+        upcoming = upcoming.join(
+            event_category_table,
+            event_category_table.c.event_id == Event.id
+        ).where(event_category_table.c.category_id == parent.c.id)
+    upcoming = upcoming.order_by(
+        Event.start_datetime, Event.id
+    ).limit(limit).correlate(parent).lateral()
+
+    events = {id: [] for id in ids}
+    for parent_id, event in db.session.execute(
+            db.select(parent.c.id, Event).select_from(parent)
+            .join(upcoming, true())
+            .join(Event, Event.id == upcoming.c.id)
+            .order_by(Event.start_datetime, Event.id)):
+        events[parent_id].append(event)
+    return events
+
+
 if __name__ == "__main__":
     print("What are you doing?")
@@ -0,0 +1,83 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+PER_PAGE = 20
+
+# items of one page and the cursors of its neighbours, None at either end
+Page = namedtuple('Page', ['items', 'next_cursor', 'prev_cursor'])
+
+
+def encode_cursor(direction, values):
+    values = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    payload = json.dumps([direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    # (direction, values) of a cursor, a broken one starts from the top
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return 'next', None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return 'next', None
+    return direction, [
+        datetime.fromisoformat(value['dt']) if isinstance(value, dict)
+        else value
+        for value in values
+    ]
+
+
+# Keyset (seek) pagination of an ORM query. keys are the columns or
+# expressions the rows are ordered by, the last one has to be unique
+# (usually the primary key) for the cursors to be stable. A page is one
+# query seeking past the cursor instead of skipping rows with OFFSET.
+def paginate(query, keys, cursor=None, per_page=PER_PAGE):
+    direction, values = decode_cursor(cursor) if cursor else ('next', None)
+    if values is not None and len(values) != len(keys):
+        direction, values = 'next', None
+
+    if values is not None:
+        if direction == 'next':
+            query = query.filter(tuple_(*keys) > tuple_(*values))
+        else:
+            query = query.filter(tuple_(*keys) < tuple_(*values))
+
+    if direction == 'next':
+        order = keys
+    else:
+        order = [key.desc() for key in keys]
+
+    rows = query.add_columns(*keys).order_by(None).order_by(
+        *order
+    ).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    first = list(rows[0][1:]) if rows else None
+    last = list(rows[-1][1:]) if rows else None
+
+    if direction == 'next':
+        more_after, more_before = has_more, values is not None
+    else:
+        more_after, more_before = values is not None, has_more
+
+    return Page(
+        items=items,
+        next_cursor=encode_cursor('next', last) if more_after and rows
+        else None,
+        prev_cursor=encode_cursor('prev', first) if more_before and rows
+        else None
+    )
@@ -0,0 +1,168 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import secrets
+import time
+from datetime import datetime
+
+from flask import g, request
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from models import RoleEnum
+
+# ?_profile=<token> or the X-Profile header turns the profiler on
+PARAMETER = '_profile'
+HEADER = 'X-Profile'
+
+PROFILE_NAME = re.compile(r'^[\w.-]+$')
+
+# (file suffix, function) whose cumulative time is reported separately
+SQL_FUNCTIONS = [
+    ('sqlalchemy/engine/default.py', 'do_execute'),
+    ('sqlalchemy/engine/default.py', 'do_execute_no_params'),
+    ('sqlalchemy/engine/default.py', 'do_executemany'),
+]
+TEMPLATE_FUNCTIONS = [
+    ('flask/templating.py', '_render'),
+]
+
+
+def cumulative_time(stats, functions):
+    total = 0.0
+    for (filename, _, name), entry in stats.stats.items():
+        for suffix, function in functions:
+            if name == function and \
+                    filename.replace(os.sep, '/').endswith(suffix):
+                total += entry[3]
+    return total
+
+
+# Profiles single requests of administrators with cProfile. A request is
+# profiled only when it carries a token signed for the logged in
+# administrator, everything else pays for one dictionary lookup. Profiles
+# go to a directory shared by the worker processes, with a JSON summary
+# next to each of them for the /profiles page.
+class RequestProfiler:
+
+    def __init__(self, app, config=None):
+        config = config or {}
+        self.enabled = config.get('enabled', True)
+        self.directory = os.path.join(
+            app.root_path, config.get('directory', 'profiles'))
+        self.keep = config.get('keep', 50)
+        self.token_max_age = config.get('token_max_age', 3600)
+        self.serializer = URLSafeTimedSerializer(app.secret_key,
+                                                 salt='profiler')
+        if not self.enabled:
+            return
+        app.before_request(self.start)
+        app.after_request(self.stop)
+        app.teardown_request(self.abandon)
+
+    def token(self, user_id):
+        return self.serializer.dumps(user_id)
+
+    def requested(self):
+        token = request.args.get(PARAMETER) or request.headers.get(HEADER)
+        if not token or not current_user.is_authenticated or \
+                current_user.role != RoleEnum.administrator:
+            return False
+        try:
+            user_id = self.serializer.loads(token,
+                                            max_age=self.token_max_age)
+        except BadSignature:
+            return False
+        return user_id == current_user.id
+
+    def start(self):
+        if not self.requested():
+            return
+        g.profiler_started = time.perf_counter()
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    def stop(self, response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        total = time.perf_counter() - g.profiler_started
+        response.headers[HEADER] = self.save(profiler, total, response)
+        return response
+
+    def abandon(self, exception):
+        # the request failed before stop(), don't leave the thread profiled
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+
+    def save(self, profiler, total, response):
+        os.makedirs(self.directory, exist_ok=True)
+        started = datetime.now()
+        name = '{:%Y%m%d-%H%M%S}-{}-{}'.format(
+            started, request.endpoint or 'none', secrets.token_hex(3))
+        profiler.dump_stats(os.path.join(self.directory, name + '.prof'))
+
+        stats = pstats.Stats(profiler)
+        # set by the SQL instrumentation when it is on
+        counted = g.get('request_stats')
+        summary = {
+            'name': name,
+            'started': started.isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'user': current_user.name,
+            'total_ms': round(total * 1000, 1),
+            'sql_ms': round(
+                cumulative_time(stats, SQL_FUNCTIONS) * 1000, 1),
+            'template_ms': round(
+                cumulative_time(stats, TEMPLATE_FUNCTIONS) * 1000, 1),
+            'queries': counted.queries if counted is not None else None,
+        }
+        with open(os.path.join(self.directory, name + '.json'), 'w') as f:
+            json.dump(summary, f)
+        self.prune()
+        return name
+
+    def prune(self):
+        names = sorted(
+            entry[:-len('.json')] for entry in os.listdir(self.directory)
+            if entry.endswith('.json')
+        )
+        for name in names[:-self.keep]:
+            for suffix in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, name + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def summaries(self):
+        # newest first
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for entry in sorted(os.listdir(self.directory), reverse=True):
+            if entry.endswith('.json'):
+                with open(os.path.join(self.directory, entry)) as f:
+                    summaries.append(json.load(f))
+        return summaries
+
+    def report(self, name, limit=40):
+        # (summary, text of the slowest functions) or None
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path + '.prof'):
+            return None
+        with open(path + '.json') as f:
+            summary = json.load(f)
+        text = io.StringIO()
+        stats = pstats.Stats(path + '.prof', stream=text)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return summary, text.getvalue()
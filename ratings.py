@@ -0,0 +1,122 @@
+from sqlalchemy import func
+
+from models import Category, Event, Place, Review, db, event_category_table
+
+
+def change_ratings(event_id, rating_sum, rating_count):
+    # adds to the totals of the event, its place and its categories
+    db.session.execute(
+        db.update(Event).where(Event.id == event_id).values(
+            rating_sum=Event.rating_sum + rating_sum,
+            rating_count=Event.rating_count + rating_count
+        )
+    )
+    db.session.execute(
+        db.update(Place).where(
+            Place.id == Event.place_id,
+            Event.id == event_id
+        ).values(
+            rating_sum=Place.rating_sum + rating_sum,
+            rating_count=Place.rating_count + rating_count
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.update(Category).where(
+            Category.id == event_category_table.c.category_id,
+            event_category_table.c.event_id == event_id
+        ).values(
+            rating_sum=Category.rating_sum + rating_sum,
+            rating_count=Category.rating_count + rating_count
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def add_review(review):
+    db.session.add(review)
+    change_ratings(review.event_id, review.rating, 1)
+
+
+def remove_review(review):
+    db.session.delete(review)
+    change_ratings(review.event_id, -review.rating, -1)
+
+
+def shift_event_ratings(event_id, sign):
+    # adds (1) or takes away (-1) the event's totals from its current place
+    # and categories
+    db.session.execute(
+        db.update(Place).where(
+            Place.id == Event.place_id,
+            Event.id == event_id
+        ).values(
+            rating_sum=Place.rating_sum + sign * Event.rating_sum,
+            rating_count=Place.rating_count + sign * Event.rating_count
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.update(Category).where(
+            Category.id == event_category_table.c.category_id,
+            event_category_table.c.event_id == Event.id,
+            Event.id == event_id
+        ).values(
+            rating_sum=Category.rating_sum + sign * Event.rating_sum,
+            rating_count=Category.rating_count + sign * Event.rating_count
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def detach_event_ratings(event):
+    # call before the event's place or categories are changed, the update
+    # flushes what is pending, or before the event is deleted; then
+    # attach_event_ratings() once they have changed
+    if event.rating_count:
+        shift_event_ratings(event.id, -1)
+
+
+def attach_event_ratings(event):
+    if event.rating_count:
+        shift_event_ratings(event.id, 1)
+
+
+def reconcile_ratings():
+    # recomputes the totals that drifted from the reviews, returns the
+    # number of repaired events, places and categories
+    event_sum = db.select(func.coalesce(func.sum(Review.rating), 0)).where(
+        Review.event_id == Event.id).scalar_subquery()
+    event_count = db.select(func.count()).where(
+        Review.event_id == Event.id).scalar_subquery()
+
+    def place_total(column):
+        return db.select(func.coalesce(func.sum(column), 0)).where(
+            Event.place_id == Place.id
+        ).scalar_subquery()
+
+    def category_total(column):
+        return db.select(func.coalesce(func.sum(column), 0)).select_from(
+            Event
+        ).join(
+            event_category_table,
+            event_category_table.c.event_id == Event.id
+        ).where(
+            event_category_table.c.category_id == Category.id
+        ).scalar_subquery()
+
+    repaired = 0
+    # places and categories add up the event totals, events go first
+    for model, rating_sum, rating_count in [
+            (Event, event_sum, event_count),
+            (Place, place_total(Event.rating_sum),
+             place_total(Event.rating_count)),
+            (Category, category_total(Event.rating_sum),
+             category_total(Event.rating_count))]:
+        repaired += db.session.execute(
+            db.update(model).where(
+                (model.rating_sum != rating_sum) |
+                (model.rating_count != rating_count)
+            ).values(
+                rating_sum=rating_sum,
+                rating_count=rating_count
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+    db.session.commit()
+    return repaired
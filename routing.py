@@ -0,0 +1,188 @@
+import itertools
+import re
+import time
+
+from flask import current_app, has_app_context, has_request_context, request
+from flask import session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.sql.elements import TextClause
+
+READ_METHODS = ('GET', 'HEAD')
+
+# flask session key, the user's reads stay on the primary until then
+PRIMARY_UNTIL = '_primary_until'
+
+# seconds the replica is behind the primary, 0 when it has replayed all WAL
+# it received and NULL when it isn't a standby at all
+LAG_QUERY = text('''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+''')
+
+
+# raw SQL that may read from a replica, unless it locks rows
+READ_ONLY_SQL = re.compile(r'\s*(SELECT|SHOW)\b', re.IGNORECASE)
+LOCKING_SQL = re.compile(r'\bFOR\s+(NO\s+KEY\s+|KEY\s+)?(UPDATE|SHARE)\b',
+                         re.IGNORECASE)
+
+
+def replica_binds(config, engine_options=None):
+    # SQLALCHEMY_BINDS entries of the replica DSNs in config.yaml
+    binds = {}
+    for i, dsn in enumerate(config.get('replicas') or []):
+        options = dict(engine_options or {})
+        options.update(
+            url=dsn,
+            # a replica that went away must not hang requests
+            pool_pre_ping=True,
+            connect_args=dict(options.get('connect_args', {}),
+                              connect_timeout=config.get(
+                                  'replica_connect_timeout', 2))
+        )
+        binds['replica-{}'.format(i)] = options
+    return binds
+
+
+def writes(clause):
+    # statements that must run on the primary: DML, locking reads, raw SQL
+    # other than a plain SELECT or SHOW, and anything executed with
+    # execution_options(primary=True), e.g. a SELECT of a function that
+    # writes
+    if clause is None:
+        return False
+    if getattr(clause, '_execution_options', {}).get('primary'):
+        return True
+    if isinstance(clause, TextClause):
+        return not READ_ONLY_SQL.match(clause.text) or \
+            LOCKING_SQL.search(clause.text) is not None
+    return getattr(clause, 'is_dml', False) or \
+        getattr(clause, '_for_update_arg', None) is not None
+
+
+class Replica:
+
+    def __init__(self, name):
+        self.name = name
+        self.healthy = True
+        self.checked = float('-inf')
+
+
+# Sends the reads of GET requests to the replicas, round robin. A request
+# reads from one replica, or from the primary after it wrote anything, and
+# the user's next requests read from the primary for read_your_writes
+# seconds so that a redirect after a POST shows the change. Replicas are
+# checked for health and lag at most every check_interval seconds, reads
+# fall back to the primary when none of them is usable.
+class ReplicaRouter:
+
+    def __init__(self, app, db, config=None):
+        config = config or {}
+        self.app = app
+        self.db = db
+        self.max_lag = config.get('replica_max_lag', 5)
+        self.check_interval = config.get('replica_check_interval', 5)
+        self.read_your_writes = config.get('read_your_writes', 5)
+        self.replicas = [Replica(name) for name in sorted(
+            app.config.get('SQLALCHEMY_BINDS', {}))
+            if name.startswith('replica-')]
+        self.turn = itertools.count()
+        app.extensions['replica_router'] = self
+        if not self.replicas:
+            return
+        app.after_request(self.after_request)
+        with app.app_context():
+            for replica in self.replicas:
+                event.listen(self.db.engines[replica.name], 'handle_error',
+                             self.on_error(replica))
+
+    def on_error(self, replica):
+        def handle_error(context):
+            # lost connections take the replica out until the next check
+            if context.is_disconnect:
+                replica.healthy = False
+                replica.checked = time.monotonic()
+        return handle_error
+
+    def check(self, replica):
+        replica.checked = time.monotonic()
+        try:
+            with self.db.engines[replica.name].connect() as connection:
+                lag = connection.execute(LAG_QUERY).scalar()
+        except SQLAlchemyError as error:
+            self.app.logger.warning('replica %s is down: %s', replica.name,
+                                    error)
+            replica.healthy = False
+            return
+        replica.healthy = lag is None or lag <= self.max_lag
+        if not replica.healthy:
+            self.app.logger.warning('replica %s lags %.1fs behind',
+                                    replica.name, lag)
+
+    def pick(self):
+        # a usable replica, None when there is none
+        now = time.monotonic()
+        start = next(self.turn)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if now - replica.checked >= self.check_interval:
+                self.check(replica)
+            if replica.healthy:
+                return replica
+        return None
+
+    def connect(self, session):
+        # engine of the replica the session reads from, connected up front
+        # so that a replica that died since its last check costs the
+        # request a fallback to the primary rather than an error
+        replica = self.pick()
+        if replica is None:
+            return None
+        engine = self.db.engines[replica.name]
+        try:
+            session.connection(bind_arguments={'bind': engine})
+        except DBAPIError as error:
+            self.app.logger.warning('replica %s is down: %s', replica.name,
+                                    error.orig)
+            replica.healthy = False
+            replica.checked = time.monotonic()
+            return None
+        return engine
+
+    def route(self, session, clause):
+        # engine for the statement, None for the primary
+        if not self.replicas or not has_request_context():
+            return None
+        if session._flushing or writes(clause):
+            session.info['wrote'] = True
+            return None
+        if request.method not in READ_METHODS or session.info.get('wrote'):
+            return None
+        if flask_session.get(PRIMARY_UNTIL, 0) > time.time():
+            return None
+        if 'replica' not in session.info:
+            session.info['replica'] = self.connect(session)
+        return session.info['replica']
+
+    def after_request(self, response):
+        if self.read_your_writes and self.db.session.info.get('wrote'):
+            flask_session[PRIMARY_UNTIL] = time.time() + \
+                self.read_your_writes
+        return response
+
+
+class RoutingSession(Session):
+    # the session of models.db, asks the app's ReplicaRouter where to read
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            router = current_app.extensions.get('replica_router')
+            engine = router.route(self, clause) if router else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
@@ -0,0 +1,37 @@
+from sqlalchemy import Float, cast, func, or_, text
+
+from models import Event, db
+
+# pg_trgm availability per database, looked up once per process
+_trigram_support = {}
+
+
+def has_trigram_support():
+    engine = db.engine
+    if engine.url not in _trigram_support:
+        supported = False
+        if engine.dialect.name == 'postgresql':
+            supported = db.session.execute(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )).first() is not None
+        _trigram_support[engine.url] = supported
+    return _trigram_support[engine.url]
+
+
+def event_name_filter(term):
+    # substring match, plus typo tolerant word similarity when pg_trgm is
+    # installed; both are served by the trigram GIN index on event.name
+    substring = Event.name.ilike('%{}%'.format(term))
+    if not has_trigram_support():
+        return substring
+    return or_(substring, Event.name.op('%>')(term))
+
+
+def event_name_rank(term):
+    # sort key putting the best matches first, plain ILIKE has no rank.
+    # word_similarity() is a real, the cursor keeps the key as a float8
+    # which has to compare equal to it on the page boundary
+    if not has_trigram_support():
+        return None
+    return (-cast(func.word_similarity(term, Event.name), Float)).label(
+        'name_rank')
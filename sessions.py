@@ -0,0 +1,219 @@
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy.dialects.postgresql import insert
+from werkzeug.datastructures import CallbackDict
+
+from models import UserSession, db
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    # only the session id travels in the cookie, the data stays in the store
+
+    def __init__(self, initial=None, sid=None, expires=None, new=False):
+        def on_update(session):
+            session.modified = True
+
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.expires = expires
+        self.new = new
+        self.modified = False
+        # flask_login's key, a change of the user gets a fresh session id
+        self.loaded_user_id = self.get('_user_id')
+
+
+class DatabaseStore:
+    # user_session table, expired rows are removed by `flask purge-sessions`
+
+    def load(self, sid):
+        with db.engine.connect() as connection:
+            row = connection.execute(
+                db.select(UserSession.data, UserSession.expires_at).where(
+                    UserSession.id == sid,
+                    UserSession.expires_at > datetime.now()
+                )
+            ).first()
+        return tuple(row) if row is not None else None
+
+    def save(self, sid, data, user_id, expires):
+        statement = insert(UserSession).values(
+            id=sid, data=data, expires_at=expires,
+            user_id=int(user_id) if user_id is not None else None
+        )
+        with db.engine.begin() as connection:
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[UserSession.id],
+                set_={
+                    'data': statement.excluded.data,
+                    'user_id': statement.excluded.user_id,
+                    'expires_at': statement.excluded.expires_at
+                }
+            ))
+
+    def touch(self, sid, expires):
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.update(UserSession).where(UserSession.id == sid)
+                .values(expires_at=expires)
+            )
+
+    def delete(self, sid):
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.delete(UserSession).where(UserSession.id == sid)
+            )
+
+    def delete_user(self, user_id):
+        with db.engine.begin() as connection:
+            return connection.execute(
+                db.delete(UserSession).where(
+                    UserSession.user_id == user_id)
+            ).rowcount
+
+    def purge(self):
+        with db.engine.begin() as connection:
+            return connection.execute(
+                db.delete(UserSession).where(
+                    UserSession.expires_at <= datetime.now())
+            ).rowcount
+
+
+class RedisStore:
+    # any Redis compatible server, keys expire on their own; every user has
+    # a set of their session ids for revocation
+
+    def __init__(self, url, prefix='iis:session:'):
+        import redis  # optional, only needed with the redis backend
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def load(self, sid):
+        pipe = self.client.pipeline()
+        pipe.get(self.prefix + sid)
+        pipe.pttl(self.prefix + sid)
+        data, ttl = pipe.execute()
+        if data is None or ttl < 0:
+            return None
+        return (data.decode('utf-8'),
+                datetime.now() + timedelta(milliseconds=ttl))
+
+    def save(self, sid, data, user_id, expires):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + sid, data.encode('utf-8'),
+                 pxat=self.timestamp(expires))
+        if user_id is not None:
+            pipe.sadd(self.user_key(user_id), sid)
+        pipe.execute()
+
+    def touch(self, sid, expires):
+        self.client.pexpireat(self.prefix + sid, self.timestamp(expires))
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def delete_user(self, user_id):
+        sids = self.client.smembers(self.user_key(user_id))
+        keys = [self.prefix + sid.decode('utf-8') for sid in sids]
+        deleted = self.client.delete(*keys) if keys else 0
+        self.client.delete(self.user_key(user_id))
+        return deleted
+
+    def purge(self):
+        return 0
+
+    def user_key(self, user_id):
+        return '{}user:{}'.format(self.prefix, user_id)
+
+    def timestamp(self, expires):
+        return int(expires.timestamp() * 1000)
+
+
+# Keeps sessions server side with a sliding expiry. A request extends the
+# session only once refresh_after of its lifetime has passed, the store and
+# the cookie are written only then or when the session data changes, so most
+# requests send no Set-Cookie at all. Static files never touch the store.
+class ServerSideSessionInterface(SessionInterface):
+    # same format as the cookie sessions, keeps tuples of flashes and such
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.lifetime = timedelta(minutes=config.get('lifetime', 30))
+        self.refresh_after = config.get('refresh_after', 0.5)
+        if config.get('backend', 'database') == 'redis':
+            self.store = RedisStore(config['redis_url'])
+        else:
+            self.store = DatabaseStore()
+
+    def open_session(self, app, request):
+        # the endpoint isn't matched yet when the session is opened
+        if app.has_static_folder and request.path.startswith(
+                app.static_url_path + '/'):
+            return self.make_null_session(app)
+
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            stored = self.store.load(sid)
+            if stored is not None:
+                data, expires = stored
+                return ServerSideSession(
+                    self.serializer.loads(data), sid=sid, expires=expires
+                )
+        return ServerSideSession(new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = datetime.now()
+        expires = session.expires
+        if session.get('_user_id') != session.loaded_user_id:
+            # logging in or out, don't let the old id carry the new identity
+            if not session.new:
+                self.store.delete(session.sid)
+            session.sid = None
+        new_sid = session.sid is None
+        if new_sid:
+            session.sid = secrets.token_urlsafe(32)
+
+        refresh = new_sid or \
+            expires - now < self.lifetime * (1 - self.refresh_after)
+        if refresh:
+            expires = now + self.lifetime
+
+        if session.modified or new_sid:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)),
+                            session.get('_user_id'), expires)
+        elif refresh:
+            self.store.touch(session.sid, expires)
+
+        # the response may depend on what is in the session
+        response.vary.add('Cookie')
+        if refresh:
+            response.set_cookie(
+                name,
+                session.sid,
+                max_age=self.lifetime,
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+def revoke_user_sessions(user_id):
+    # logs the user out everywhere, returns the number of removed sessions
+    return current_app.session_interface.store.delete_user(user_id)
@@ -0,0 +1,40 @@
+"""Fixtures of the database tests.
+
+The tests refill the database from config.yaml with fill_db.py, which
+EMPTIES ALL TABLES, so they only run with FILL_DATABASE=1 set:
+
+    FILL_DATABASE=1 python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as application  # noqa: E402
+import bench_routes  # noqa: E402
+import fill_db  # noqa: E402
+from models import db  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def refill():
+    # refill(*fill_db arguments) empties and refills the database
+    if not os.environ.get('FILL_DATABASE'):
+        pytest.skip('empties the database, set FILL_DATABASE=1 to run')
+    application.app.config['WTF_CSRF_ENABLED'] = False
+
+    def refill(*args):
+        fill_args = fill_db.build_parser().parse_args(
+            list(args) + ['--truncate'])
+        assert fill_db.fill(fill_args) == 0
+        with application.app.app_context():
+            bench_routes.reset_caches()
+    return refill
+
+
+@pytest.fixture(scope='session')
+def counter():
+    with application.app.app_context():
+        return bench_routes.StatementCounter(db.engine)
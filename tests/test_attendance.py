@@ -0,0 +1,53 @@
+"""Concurrent attends never oversell an event."""
+import threading
+
+import pytest
+
+import app as application
+import bench_attend
+from attendance import ATTENDING, FULL
+from models import Event, UserEvent, db
+
+SCALE = ['--users', '20', '--places', '2', '--categories', '2',
+         '--events', '10', '--attendance', '20', '--reviews', '5']
+
+USERS = 200
+CAPACITY = 50
+THREADS = 8
+
+
+@pytest.fixture(scope='module')
+def event(refill):
+    refill(*SCALE)
+    with application.app.app_context():
+        event_id, owner_id, user_ids = bench_attend.setup(USERS, CAPACITY)
+    yield event_id, user_ids
+    with application.app.app_context():
+        bench_attend.teardown(event_id, owner_id)
+
+
+def test_no_oversell(event):
+    event_id, user_ids = event
+    outcomes = {}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=bench_attend.worker, args=(
+            event_id, user_ids[i::THREADS], outcomes, lock))
+        for i in range(THREADS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with application.app.app_context():
+        attendees = db.session.execute(
+            db.select(db.func.count()).select_from(UserEvent).where(
+                UserEvent.event_id == event_id)
+        ).scalar()
+        approved_count = db.session.get(Event, event_id).approved_count
+        db.session.remove()
+
+    assert outcomes == {ATTENDING: CAPACITY, FULL: USERS - CAPACITY}
+    assert attendees == CAPACITY
+    assert approved_count == CAPACITY
@@ -0,0 +1,32 @@
+"""The maintenance commands report what they did."""
+import pytest
+
+import app as application
+
+SCALE = ['--users', '20', '--places', '2', '--categories', '2',
+         '--events', '10', '--attendance', '20', '--reviews', '5']
+
+
+@pytest.fixture(scope='module')
+def runner(refill):
+    refill(*SCALE)
+    return application.app.test_cli_runner()
+
+
+@pytest.mark.parametrize('args, output', [
+    (['reconcile-attendance'], 'Repaired 0 events\n'),
+    (['reconcile-ratings'], 'Repaired 0 rows\n'),
+    (['refresh-leaderboard'], ''),
+    (['revoke-sessions', 'nobody'], 'No user named nobody\n'),
+    (['revoke-sessions', 'admin'], 'Revoked 0 sessions\n'),
+])
+def test_command_output(runner, args, output):
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0
+    assert result.output == output
+
+
+def test_purge_sessions(runner):
+    result = runner.invoke(args=['purge-sessions'])
+    assert result.exit_code == 0
+    assert result.output.startswith('Removed ')
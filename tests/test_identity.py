@@ -0,0 +1,57 @@
+"""Role changes reach the identity caches of other workers."""
+import pytest
+
+import app as application
+import fill_db
+from identity import IDENTITY_VERSION, IdentityCache
+from models import RoleEnum, User, db
+
+SCALE = ['--users', '20', '--places', '2', '--categories', '2',
+         '--events', '10', '--attendance', '20', '--reviews', '5']
+
+
+@pytest.fixture(scope='module')
+def user(refill):
+    # a generated user, promoted to administrator
+    refill(*SCALE)
+    with application.app.app_context():
+        user = db.session.execute(
+            db.select(User).where(User.role == RoleEnum.user).limit(1)
+        ).scalar()
+        user.role = RoleEnum.administrator
+        db.session.commit()
+        name, user_id = user.name, user.id
+        db.session.remove()
+    return name, user_id
+
+
+def log_in(name, password):
+    client = application.app.test_client()
+    response = client.post('/login', data={'name': name,
+                                           'password': password})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        return session.get(IDENTITY_VERSION)
+
+
+def test_demotion_reaches_other_workers(user):
+    name, user_id = user
+    # another worker caches the administrator
+    other_worker = IdentityCache()
+    version = log_in(name, fill_db.GENERATED_PASSWORD)
+    with application.app.app_context():
+        assert other_worker.load(user_id, version).role == \
+            RoleEnum.administrator
+
+    admin = application.app.test_client()
+    admin.post('/login', data={'name': 'admin',
+                               'password': 'adminTester123*'})
+    response = admin.post('/edit_user/{}'.format(user_id),
+                          data={'role': RoleEnum.user.name})
+    assert response.status_code == 302
+
+    # the demotion logged the user out, logging in again must not find the
+    # administrator in the other worker's cache
+    version = log_in(name, fill_db.GENERATED_PASSWORD)
+    with application.app.app_context():
+        assert other_worker.load(user_id, version).role == RoleEnum.user
@@ -0,0 +1,55 @@
+"""The listings issue as many statements at 10x the rows as at N rows."""
+import pytest
+
+import app as application
+import bench_routes
+import fill_db
+from models import db
+
+# N and 10x N rows of every listed table, N keeps the pages short of full
+# so that a statement per row shows up in the count
+SCALES = [
+    ['--users', '200', '--places', '5', '--categories', '4',
+     '--events', '100', '--attendance', '2k', '--reviews', '400'],
+    ['--users', '2k', '--places', '50', '--categories', '40',
+     '--events', '1k', '--attendance', '20k', '--reviews', '4k'],
+]
+
+ROUTES = ['/', '/places', '/categories', '/home']
+
+
+def statement_counts(refill, counter, scale):
+    # statements of each route on a warm worker, logged in as a reviewer,
+    # with the rendered fragments dropped
+    refill(*scale)
+    with application.app.app_context():
+        user = bench_routes.pick_fixtures()['user']
+        db.session.remove()
+
+    client = application.app.test_client()
+    login = client.post('/login', data={
+        'name': user, 'password': fill_db.GENERATED_PASSWORD
+    })
+    assert login.status_code == 302
+
+    counts = {}
+    for url in ROUTES:
+        client.get(url)
+        # rows and calendars are rendered from the database again
+        application.fragment_cache.backend.entries.clear()
+        counter.count = 0
+        response = client.get(url)
+        assert response.status_code == 200
+        counts[url] = counter.count
+    return counts
+
+
+@pytest.fixture(scope='module')
+def counts(refill, counter):
+    return [statement_counts(refill, counter, scale) for scale in SCALES]
+
+
+@pytest.mark.parametrize('url', ROUTES)
+def test_statements_do_not_grow_with_rows(counts, url):
+    small, large = counts
+    assert small[url] == large[url]
@@ -0,0 +1,44 @@
+"""The hot predicates are served by the indexes of migration 0002."""
+import pytest
+
+import app as application
+from models import Event, UserEvent, db
+
+# the planner scans small tables sequentially, with this many events the
+# indexes pay off
+SCALE = ['--users', '1k', '--events', '50k', '--attendance', '20k',
+         '--reviews', '2k']
+
+
+@pytest.fixture(scope='module')
+def filled(refill):
+    refill(*SCALE)
+    with application.app.app_context():
+        yield
+        db.session.remove()
+
+
+def plan(query):
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(db.engine)
+    return '\n'.join(
+        db.session.connection().exec_driver_sql(
+            'EXPLAIN ' + str(compiled), compiled.params
+        ).scalars()
+    )
+
+
+def test_month_window(filled):
+    now = application.dt.now()
+    assert 'ix_event_end_datetime' in plan(
+        Event.query.filter(application.overlaps_month(now.month, now.year)))
+
+
+def test_pending_requests(filled):
+    event_id = db.session.execute(
+        db.select(UserEvent.event_id).filter_by(approved=False).limit(1)
+    ).scalar()
+    assert event_id is not None
+    # the lookup of load_event_detail()
+    assert 'ix_event_user_pending' in plan(
+        UserEvent.query.filter_by(event_id=event_id, approved=False))
@@ -1,27 +1,70 @@
-from models import Category
+import hashlib
+import time
+
+from metrics import observe_cache
+from models import Category, db
 from wtforms import ValidationError
 
+# approved category tree, rebuilt when the category version is bumped by a
+# write in this process or when it gets older than the TTL, so that changes
+# made by other workers show up as well
+CATEGORY_CACHE_TTL = 60
 
-def get_category_choices():
-    # query only approved categories
-    categories = Category.query.filter_by(approved=True).all()
+_category_version = 0
+_category_cache = {}
+
+
+def bump_category_version():
+    global _category_version
+    _category_version += 1
+
+
+def build_category_choices():
+    # query only approved categories, in one go
+    rows = db.session.execute(
+        db.select(Category.id, Category.name, Category.parent_id)
+        .filter_by(approved=True)
+        .order_by(Category.id)
+    ).all()
+
+    children = {}
+    for row in rows:
+        children.setdefault(row.parent_id, []).append(row)
 
     def get_category_tree(category, prefix=''):
         choices = [(category.id, prefix + category.name)]
-        for subcategory in category.children:
-            # if approved
-            if subcategory.approved:
-                choices.extend(get_category_tree(subcategory, prefix + '>'))
+        for subcategory in children.get(category.id, []):
+            choices.extend(get_category_tree(subcategory, prefix + '>'))
         return choices
     choices = [(None, '---none---')]
-    for category in categories:
-        if category.parent is None:
-            if category.approved:
-                choices.extend(get_category_tree(category))
+    for category in children.get(None, []):
+        choices.extend(get_category_tree(category))
     return choices
 
 
+def get_category_choices():
+    version = _category_version
+    cached = _category_cache.get(version)
+    if cached is not None and \
+            time.monotonic() - cached[0] > CATEGORY_CACHE_TTL:
+        cached = None
+    observe_cache('category_tree', cached is not None)
+    if cached is None:
+        cached = (time.monotonic(), build_category_choices())
+        _category_cache.clear()
+        _category_cache[version] = cached
+    # callers pop the none choice, hand out a copy
+    return list(cached[1])
+
+
 def validate_date(form, field):
     if form.start_datetime.data and form.end_datetime.data:
         if field.data <= form.start_datetime.data:
             raise ValidationError('End time must be after start time.')
+
+
+def make_etag(*parts):
+    # strong validator of a response built from the given parts
+    return hashlib.sha1(
+        '|'.join(str(part) for part in parts).encode('utf-8')
+    ).hexdigest()